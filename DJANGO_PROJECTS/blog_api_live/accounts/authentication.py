@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db.models.base import ModelState
+from rest_framework import exceptions
+from rest_framework.authentication import (BaseAuthentication,
+                                           TokenAuthentication,
+                                           get_authorization_header)
+
+from .tokens import read_access_token
+
+
+class TokenCache:
+    """Bounded, thread-safe LRU of ``key -> (user, token)`` with a TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            stale = [key for key, (_, (user, _token))
+                     in self._entries.items() if user.pk == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, "TOKEN_AUTH_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "TOKEN_AUTH_CACHE_TTL", 60),
+)
+
+
+def copy_instance(instance):
+    copy = type(instance).__new__(type(instance))
+    copy.__dict__.update({name: value for name, value
+                          in instance.__dict__.items() if name != "_state"})
+    copy._state = ModelState()
+    copy._state.adding = False
+    copy._state.db = instance._state.db
+    return copy
+
+
+def copy_credentials(user, token):
+    """Copies of ``(user, token)`` that one request may change freely."""
+    user, token = copy_instance(user), copy_instance(token)
+    token._state.fields_cache["user"] = user
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` that skips the Token/User join on repeat keys.
+
+    Entries are dropped when their token or user is saved or deleted
+    (see ``accounts.signals``), and expire after ``TOKEN_AUTH_CACHE_TTL``
+    seconds in any case. Each request gets its own copy of the cached
+    user and token, so a view that changes ``request.user`` never leaks
+    into another request.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return copy_credentials(*cached)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, copy_credentials(user, token))
+        return user, token
+
+    async def aauthenticate(self, request):
+        """Async twin of ``authenticate()`` for plain async Django views."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return copy_credentials(*cached)
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related("user").aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        token_cache.set(key, copy_credentials(token.user, token))
+        return token.user, token
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """``Authorization: Bearer <access token>`` from ``accounts.tokens``.
+
+    Verification is CPU only. ``request.user`` is built from the token's
+    claims, not loaded from the database.
+    """
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        try:
+            user = read_access_token(auth[1].decode())
+        except (UnicodeError, signing.BadSignature):
+            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+        return user, None
+
+    async def aauthenticate(self, request):
+        # Verification does no I/O, so it can run on the event loop
+        return self.authenticate(request)
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class SignedTokenUserAuthentication(SignedTokenAuthentication):
+    """``SignedTokenAuthentication`` that loads the real user row.
+
+    For views that change ``request.user``: the claims-only user cannot
+    be saved. The row must still be active and on the token's
+    ``token_version``.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None:
+            return None
+        claims = result[0]
+        user = (get_user_model().objects
+                .filter(pk=claims.pk, is_active=True,
+                        token_version=claims.token_version).first())
+        if user is None:
+            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+        return user, None
+
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.6 on 2026-10-18 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_customuser_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpentRefreshToken',
+            fields=[
+                ('jti', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('spent_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
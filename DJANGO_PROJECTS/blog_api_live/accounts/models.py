@@ -4,3 +4,11 @@ from django.db import models
 class CustomUser(AbstractUser):
     name = models.CharField(null=True, blank=True, 
             max_length=100)
+    # Bumped to revoke every signed token issued to the user
+    token_version = models.PositiveIntegerField(default=0)
+
+
+class SpentRefreshToken(models.Model):
+    """A refresh token that was exchanged once and may not be again."""
+    jti = models.CharField(max_length=32, primary_key=True)
+    spent_at = models.DateTimeField(auto_now_add=True, db_index=True)
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .tokens import bump_token_version, revocations
+
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_tokens_on_user_save(sender, instance, created, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+    # set_password() leaves _password set until save() returns
+    password_changed = instance._password is not None
+    if not created and (password_changed or not instance.is_active):
+        # Saved on the row, so reactivating does not revive old tokens
+        bump_token_version(instance)
+    revocations.note(instance.pk, instance.token_version)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_tokens_on_user_delete(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+    revocations.note(instance.pk, instance.token_version + 1)
@@ -1,3 +1,236 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from posts import caching
+from .authentication import (CachedTokenAuthentication, TokenCache,
+                             token_cache)
+from .tokens import issue_tokens, read_access_token, revocations
+
+User = get_user_model()
+
+
+class TokenCacheTest(APITestCase):
+    def test_lru_eviction(self):
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_ttl_expiry(self):
+        cache = TokenCache(maxsize=2, ttl=0)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+
+class CachedTokenAuthenticationTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.post_list_url = reverse('post_list')
+
+    def setUp(self):
+        token_cache.clear()
+        caching.get_cache().clear()
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_requests_skip_token_lookup(self):
+        # token lookup + validator aggregate + page
+        with self.assertNumQueries(3):
+            response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # validator aggregate; the page comes from the list cache
+        with self.assertNumQueries(1):
+            response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_each_request_gets_its_own_user(self):
+        authentication = CachedTokenAuthentication()
+        first, first_token = authentication.authenticate_credentials(
+            self.token.key)
+        first.first_name = 'Changed'
+        user, token = authentication.authenticate_credentials(self.token.key)
+        self.assertIsNot(user, first)
+        self.assertIsNot(token, first_token)
+        self.assertEqual(user.first_name, '')
+        user.first_name = 'Again'
+        with self.assertNumQueries(0):
+            again, token = authentication.authenticate_credentials(
+                self.token.key)
+            self.assertIs(token.user, again)
+        self.assertEqual(again.first_name, '')
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(self.post_list_url)
+        self.token.delete()
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code,
+                        status.HTTP_403_FORBIDDEN)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(self.post_list_url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code,
+                        status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(SIGNED_TOKEN_ACCESS_TTL=300)
+class SignedTokenAuthenticationTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='signed',
+                                    password='signedpassword')
+        cls.post_list_url = reverse('post_list')
+
+    def setUp(self):
+        revocations.clear()
+        caching.get_cache().clear()
+        self.tokens = issue_tokens(self.user)
+
+    def bearer(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_login_returns_signed_tokens(self):
+        response = self.client.post(reverse('rest_login'), {
+            'username': 'signed', 'password': 'signedpassword'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('key', response.data)
+        self.assertIn('access', response.data)
+        self.assertIn('refresh', response.data)
+
+    def test_access_token_needs_no_auth_query(self):
+        self.bearer(self.tokens['access'])
+        # validator aggregate + page, no user or token lookup
+        with self.assertNumQueries(2):
+            response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_tampered_token_is_rejected(self):
+        self.bearer(self.tokens['access'] + 'x')
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_expired_token_is_rejected(self):
+        self.bearer(self.tokens['access'])
+        with override_settings(SIGNED_TOKEN_ACCESS_TTL=-1):
+            response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_refresh_issues_new_pair(self):
+        response = self.client.post(reverse('token_refresh'),
+                                    {'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.bearer(response.data['access'])
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_revoke_invalidates_issued_tokens(self):
+        self.bearer(self.tokens['access'])
+        response = self.client.post(reverse('token_revoke'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post(reverse('token_refresh'),
+                                    {'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        self.bearer(self.tokens['access'])
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_reactivated_user_gets_working_tokens(self):
+        self.user.is_active = False
+        self.user.save()
+        self.user.is_active = True
+        self.user.save()
+        self.bearer(self.tokens['access'])
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.user.refresh_from_db()
+        tokens = issue_tokens(self.user)
+        self.bearer(tokens['access'])
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('token_refresh'),
+                                    {'refresh': tokens['refresh']})
+        self.bearer(response.data['access'])
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_claims_user_cannot_be_saved(self):
+        user = read_access_token(self.tokens['access'])
+        with self.assertRaises(TypeError):
+            user.save()
+        with self.assertRaises(TypeError):
+            user.delete()
+
+    def test_user_details_patch_keeps_the_row(self):
+        self.user.email = 'signed@example.com'
+        self.user.name = 'Signed'
+        self.user.save()
+        self.tokens = issue_tokens(self.user)
+        self.bearer(self.tokens['access'])
+        response = self.client.patch(reverse('rest_user_details'),
+                                     {'first_name': 'Changed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], 'signed@example.com')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Changed')
+        self.assertEqual(self.user.email, 'signed@example.com')
+        self.assertEqual(self.user.name, 'Signed')
+        self.client.credentials()
+        response = self.client.post(reverse('rest_login'), {
+            'username': 'signed', 'password': 'signedpassword'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_password_change_with_bearer_token(self):
+        self.bearer(self.tokens['access'])
+        response = self.client.post(reverse('rest_password_change'), {
+            'new_password1': 'changed-Pa55word',
+            'new_password2': 'changed-Pa55word'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('changed-Pa55word'))
+        self.assertEqual(self.user.username, 'signed')
+        # Every signed token issued before the change is revoked
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.credentials()
+        response = self.client.post(reverse('token_refresh'),
+                                    {'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_refresh_token_works_once(self):
+        response = self.client.post(reverse('token_refresh'),
+                                    {'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['refresh'], self.tokens['refresh'])
+        rotated = response.data['refresh']
+        response = self.client.post(reverse('token_refresh'),
+                                    {'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post(reverse('token_refresh'),
+                                    {'refresh': rotated})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_user_details_rejects_revoked_token(self):
+        User.objects.filter(pk=self.user.pk).update(token_version=1)
+        self.bearer(self.tokens['access'])
+        response = self.client.get(reverse('rest_user_details'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
-# Create your tests here.
@@ -0,0 +1,135 @@
+"""Short-lived signed access tokens built on ``django.core.signing``.
+
+An access token carries the user's id, the claims permission checks
+need (username, is_staff, is_superuser) and the user's ``token_version``
+revocation counter. Verifying it is an HMAC check with no database
+access. A longer-lived refresh token is exchanged for a new pair at
+``token/refresh/``; that exchange re-reads the user row, and each
+refresh token can be exchanged only once.
+
+Revoking (bumping ``token_version``) takes effect at once for refresh
+tokens everywhere and for access tokens in the revoking process. Other
+workers keep accepting already-issued access tokens until they expire,
+at most ``SIGNED_TOKEN_ACCESS_TTL`` seconds later.
+"""
+import secrets
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SpentRefreshToken
+
+ACCESS_SALT = "accounts.tokens.access"
+REFRESH_SALT = "accounts.tokens.refresh"
+
+
+def access_ttl():
+    return getattr(settings, "SIGNED_TOKEN_ACCESS_TTL", 300)
+
+
+def refresh_ttl():
+    return getattr(settings, "SIGNED_TOKEN_REFRESH_TTL", 14 * 24 * 3600)
+
+
+class RevocationRegistry:
+    """Newest ``token_version`` this process has seen for each user."""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def note(self, user_id, version):
+        with self._lock:
+            if version > self._versions.get(user_id, -1):
+                self._versions[user_id] = version
+
+    def is_revoked(self, user_id, version):
+        return version < self._versions.get(user_id, -1)
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+
+revocations = RevocationRegistry()
+
+
+def bump_token_version(user):
+    """Revoke every signed token issued to ``user`` so far.
+
+    The new ``token_version`` is saved on the row and read back onto
+    ``user``; tokens issued from then on carry it.
+    """
+    (get_user_model().objects.filter(pk=user.pk)
+     .update(token_version=F("token_version") + 1))
+    user.refresh_from_db(fields=["token_version"])
+
+
+def issue_tokens(user):
+    access = signing.dumps({
+        "uid": user.pk,
+        "rev": user.token_version,
+        "un": user.username,
+        "st": user.is_staff,
+        "su": user.is_superuser,
+    }, salt=ACCESS_SALT, compress=True)
+    refresh = signing.dumps({"uid": user.pk, "rev": user.token_version,
+                             "jti": secrets.token_hex(16)},
+                            salt=REFRESH_SALT)
+    return {"access": access, "refresh": refresh,
+            "expires_in": access_ttl()}
+
+
+def read_access_token(token):
+    """Return a claims-only user for a valid access token.
+
+    The user is built from the token without a query. Only ``pk``,
+    ``username``, ``is_staff``, ``is_superuser`` and ``token_version``
+    are meaningful; ``save()`` and ``delete()`` raise ``TypeError``.
+    Raises ``signing.BadSignature`` (or ``SignatureExpired``) otherwise.
+    """
+    claims = signing.loads(token, salt=ACCESS_SALT, max_age=access_ttl())
+    if revocations.is_revoked(claims["uid"], claims["rev"]):
+        raise signing.BadSignature("Token revoked.")
+    user = get_user_model()(
+        pk=claims["uid"], username=claims["un"], is_staff=claims["st"],
+        is_superuser=claims["su"], is_active=True,
+        token_version=claims["rev"])
+    user._state.adding = False
+    # Every other column is blank: writing it back would wipe the row
+    user.save = user.delete = refuse_write
+    return user
+
+
+def refuse_write(*args, **kwargs):
+    raise TypeError("A user built from signed token claims cannot be "
+                    "written; load it from the database first.")
+
+
+def refresh_tokens(token):
+    """Exchange a refresh token for a new token pair.
+
+    Raises ``signing.BadSignature`` if the token is invalid, expired,
+    revoked, already exchanged or belongs to an inactive user.
+    """
+    claims = signing.loads(token, salt=REFRESH_SALT, max_age=refresh_ttl())
+    user = (get_user_model().objects
+            .filter(pk=claims["uid"], is_active=True).first())
+    if (user is None or user.token_version != claims["rev"]
+            or "jti" not in claims):
+        raise signing.BadSignature("Token revoked.")
+    try:
+        with transaction.atomic():
+            SpentRefreshToken.objects.create(jti=claims["jti"])
+    except IntegrityError:
+        raise signing.BadSignature("Token already used.")
+    # Spent ids only need keeping while the token would still verify
+    cutoff = timezone.now() - timedelta(seconds=refresh_ttl())
+    SpentRefreshToken.objects.filter(spent_at__lt=cutoff).delete()
+    return issue_tokens(user)
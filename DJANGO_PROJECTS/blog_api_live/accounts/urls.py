@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import SignedTokenRefreshView, SignedTokenRevokeView
+
+urlpatterns = [
+    path("token/refresh/", SignedTokenRefreshView.as_view(),
+         name="token_refresh"),
+    path("token/revoke/", SignedTokenRevokeView.as_view(),
+         name="token_revoke"),
+]
@@ -0,0 +1,69 @@
+from dj_rest_auth.views import LoginView, PasswordChangeView, UserDetailsView
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from .authentication import (SignedTokenAuthentication,
+                             SignedTokenUserAuthentication)
+from .tokens import issue_tokens, refresh_tokens
+
+
+def user_loading_authentication_classes():
+    """The default authentication classes, with signed tokens loading
+    the real user row."""
+    return [SignedTokenUserAuthentication
+            if cls is SignedTokenAuthentication else cls
+            for cls in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+
+
+class SignedTokenLoginView(LoginView):
+    """dj-rest-auth login that also returns signed access/refresh tokens."""
+
+    def get_response(self):
+        response = super().get_response()
+        data = dict(response.data or {})
+        data.update(issue_tokens(self.user))
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SignedTokenUserDetailsView(UserDetailsView):
+    """dj-rest-auth user details; saves the real row, not the claims."""
+    authentication_classes = user_loading_authentication_classes()
+
+
+class SignedTokenPasswordChangeView(PasswordChangeView):
+    """dj-rest-auth password change; saves the real row, not the claims."""
+    authentication_classes = user_loading_authentication_classes()
+
+
+class SignedTokenRefreshView(APIView):
+    permission_classes = (AllowAny, )
+    authentication_classes = ()
+
+    def post(self, request, *args, **kwargs):
+        token = request.data.get("refresh")
+        if not token:
+            raise ValidationError({"refresh": ["This field is required."]})
+        try:
+            return Response(refresh_tokens(token))
+        except signing.BadSignature:
+            raise AuthenticationFailed("Invalid or expired refresh token.")
+
+
+class SignedTokenRevokeView(APIView):
+    """Revoke every signed token issued to the current user."""
+    permission_classes = (IsAuthenticated, )
+
+    def post(self, request, *args, **kwargs):
+        with transaction.atomic():
+            user = (get_user_model().objects.select_for_update()
+                    .get(pk=request.user.pk))
+            user.token_version += 1
+            user.save(update_fields=["token_version"])
+        return Response(status=status.HTTP_204_NO_CONTENT)
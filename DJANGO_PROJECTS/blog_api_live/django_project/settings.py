@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     #local
     'accounts', # new
     'posts', #new
+    'mailqueue',
 ]
 
 MIDDLEWARE = [
@@ -143,9 +144,47 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
-    ]
+        "accounts.authentication.CachedTokenAuthentication",
+        "accounts.authentication.SignedTokenAuthentication",
+    ],
+    # Scopes of posts.throttling, applied to the sync and async post views
+    "DEFAULT_THROTTLE_RATES": {
+        "posts_user": "600/min",
+        "posts_ip": "1200/min",
+    },
+}
+
+# SQLite file holding the throttle counters shared by all workers on the
+# host; defaults to a file in the temp dir.
+# THROTTLE_STORE_PATH = "/var/run/blog_api_live/throttle.sqlite3"
+
+# Points THROTTLE_STORE_PATH at a temp file for the test run
+TEST_RUNNER = "django_project.test_runner.TestRunner"
+
+# In-process cache used by accounts.authentication.CachedTokenAuthentication
+TOKEN_AUTH_CACHE_SIZE = 1024
+TOKEN_AUTH_CACHE_TTL = 60 # seconds
+
+# Lifetimes of the signed tokens issued by accounts.tokens
+SIGNED_TOKEN_ACCESS_TTL = 300 # seconds
+SIGNED_TOKEN_REFRESH_TTL = 14 * 24 * 3600 # seconds
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Swap for FileBasedCache (or a shared backend) so that several
+    # workers share entries and hit/miss counters
+    "post_list": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "post-list",
+    },
 }
+POST_LIST_CACHE = "post_list"
+POST_LIST_CACHE_TTL = 300 # seconds
 
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+# Requests only enqueue mail; `manage.py send_queued_mail --loop`
+# delivers it through MAILQUEUE_BACKEND (SMTP in production).
+EMAIL_BACKEND = "mailqueue.backends.QueuedEmailBackend"
+MAILQUEUE_BACKEND = "django.core.mail.backends.console.EmailBackend"
 #SITE_ID = 1
\ No newline at end of file
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """``DiscoverRunner`` with the throttle counters in a throwaway file,
+    so a test run never reads or resets the host's live store."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.throttle_directory = tempfile.TemporaryDirectory()
+        self.throttle_store = override_settings(
+            THROTTLE_STORE_PATH=os.path.join(self.throttle_directory.name,
+                                             "throttle.sqlite3"))
+        self.throttle_store.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.throttle_store.disable()
+        self.throttle_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
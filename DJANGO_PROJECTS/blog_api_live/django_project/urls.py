@@ -16,11 +16,24 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from accounts.views import (SignedTokenLoginView,
+                            SignedTokenPasswordChangeView,
+                            SignedTokenUserDetailsView)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("api/v1/", include("posts.urls")),
     path("api-auth/", include("rest_framework.urls")),
+    path("api/v1/auth/", include("accounts.urls")),
+    # Shadows dj_rest_auth's login so it also returns signed tokens
+    path("api/v1/dj-rest-auth/login/", SignedTokenLoginView.as_view(),
+         name="rest_login"),
+    # ... and these so a Bearer token updates the real user row
+    path("api/v1/dj-rest-auth/user/", SignedTokenUserDetailsView.as_view(),
+         name="rest_user_details"),
+    path("api/v1/dj-rest-auth/password/change/",
+         SignedTokenPasswordChangeView.as_view(),
+         name="rest_password_change"),
     path("api/v1/dj-rest-auth/", include("dj_rest_auth.urls")),
     path("api/v1/dj-rest-auth/registration",
      include("dj_rest_auth.registration.urls"))
@@ -0,0 +1,33 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import DeadLetter, QueuedEmail
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "to", "status", "attempts", "available_at",
+                    "sent_at"]
+    list_filter = ["status"]
+    search_fields = ["subject", "to"]
+    readonly_fields = ["payload", "attempts", "last_error", "created_at",
+                       "sent_at"]
+
+
+@admin.register(DeadLetter)
+class DeadLetterAdmin(admin.ModelAdmin):
+    list_display = ["subject", "to", "attempts", "last_error", "created_at"]
+    search_fields = ["subject", "to"]
+    readonly_fields = ["subject", "to", "payload", "attempts", "last_error",
+                       "created_at"]
+    exclude = ["status", "available_at", "sent_at"]
+    actions = ["requeue"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Requeue selected messages")
+    def requeue(self, request, queryset):
+        count = queryset.update(status=QueuedEmail.PENDING, attempts=0,
+                                available_at=timezone.now())
+        self.message_user(request, f"Requeued {count} message(s).")
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+
+from mailqueue.worker import deliver_batch
+
+
+class Command(BaseCommand):
+    help = ("Deliver queued mail in batches over one connection to "
+            "MAILQUEUE_BACKEND. Runs once, or keeps polling with --loop.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument("--retry-delay", type=int, default=60,
+                            help="Seconds before the first retry; doubles "
+                                 "with each attempt.")
+        parser.add_argument("--lease", type=int, default=300,
+                            help="Seconds a claimed batch is hidden from "
+                                 "other workers.")
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=5.0,
+                            help="Seconds to sleep when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                counts = deliver_batch(
+                    batch_size=options["batch_size"],
+                    max_attempts=options["max_attempts"],
+                    lease=options["lease"],
+                    retry_delay=options["retry_delay"],
+                )
+            except OperationalError as exc:
+                # A competing worker holds the lock; leased rows are
+                # simply picked up again once the lease expires
+                if not options["loop"]:
+                    raise
+                self.stderr.write(f"claim failed: {exc}")
+                time.sleep(options["interval"])
+                continue
+            if any(counts.values()):
+                self.stdout.write(
+                    "sent {sent}, retried {retried}, dead {dead}"
+                    .format(**counts))
+            if not options["loop"]:
+                break
+            # Drain a backlog without pausing between full batches
+            if sum(counts.values()) < options["batch_size"]:
+                time.sleep(options["interval"])
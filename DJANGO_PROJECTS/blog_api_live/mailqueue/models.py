@@ -0,0 +1,121 @@
+from base64 import b64decode, b64encode
+from email import policy as email_policy
+from email.message import Message
+from email.mime.base import MIMEBase
+from email.parser import BytesParser
+
+from django.core.mail import EmailMultiAlternatives
+from django.db import models
+
+
+class QueuedEmail(models.Model):
+    """An outbound message waiting for (or done with) the worker."""
+
+    PENDING = "pending"
+    SENT = "sent"
+    DEAD = "dead"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (DEAD, "Dead"),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=PENDING)
+    subject = models.CharField(max_length=998, blank=True)
+    to = models.TextField(blank=True)
+    payload = models.JSONField()
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Not before this time; a claimed row is pushed forward by a lease
+    available_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"],
+                        name="mail_status_available_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to}"
+
+    @classmethod
+    def from_message(cls, message, available_at):
+        alternatives = getattr(message, "alternatives", [])
+        return cls(
+            subject=message.subject,
+            to=", ".join(message.to),
+            available_at=available_at,
+            payload={
+                "subject": message.subject,
+                "body": message.body,
+                "from_email": message.from_email,
+                "to": message.to,
+                "cc": message.cc,
+                "bcc": message.bcc,
+                "reply_to": message.reply_to,
+                "headers": message.extra_headers,
+                "alternatives": [list(item) for item in alternatives],
+                "attachments": [encode_attachment(item)
+                                for item in message.attachments],
+            },
+        )
+
+    def to_message(self, connection=None):
+        data = self.payload
+        message = EmailMultiAlternatives(
+            subject=data["subject"], body=data["body"],
+            from_email=data["from_email"], to=data["to"], cc=data["cc"],
+            bcc=data["bcc"], reply_to=data["reply_to"],
+            headers=data["headers"], connection=connection,
+            alternatives=[tuple(item) for item in data["alternatives"]],
+        )
+        for attachment in data["attachments"]:
+            if isinstance(attachment, dict):
+                message.attach(decode_mime_attachment(attachment))
+            else:
+                filename, content, mimetype = attachment
+                message.attach(filename, b64decode(content), mimetype)
+        return message
+
+
+class DeadLetterManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(status=QueuedEmail.DEAD)
+
+
+class DeadLetter(QueuedEmail):
+    """Messages that ran out of retries, for the admin."""
+    objects = DeadLetterManager()
+
+    class Meta:
+        proxy = True
+        verbose_name = "dead letter"
+
+
+class ParsedMIMEPart(MIMEBase):
+    """A MIME part parsed back from bytes; ``attach()`` takes it as is."""
+
+    def __init__(self, policy=None):
+        Message.__init__(self, policy=policy or email_policy.compat32)
+
+
+def encode_attachment(attachment):
+    """JSON form of an ``attach()`` argument.
+
+    A ``(filename, content, mimetype)`` tuple stays a triple; a
+    ``MIMEBase`` part is kept whole, headers included, as its bytes.
+    """
+    if isinstance(attachment, MIMEBase):
+        return {"mime": b64encode(attachment.as_bytes()).decode()}
+    filename, content, mimetype = attachment
+    if isinstance(content, str):
+        content = content.encode()
+    return filename, b64encode(content).decode(), mimetype
+
+
+def decode_mime_attachment(data):
+    return BytesParser(_class=ParsedMIMEPart).parsebytes(
+        b64decode(data["mime"]))
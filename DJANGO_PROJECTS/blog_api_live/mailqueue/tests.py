@@ -0,0 +1,184 @@
+from datetime import timedelta
+from email.mime.base import MIMEBase
+from email.mime.image import MIMEImage
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import OperationalError
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import DeadLetter, QueuedEmail
+from .worker import claim, deliver_batch
+
+User = get_user_model()
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise OSError("relay unavailable")
+
+
+QUEUED = "mailqueue.backends.QueuedEmailBackend"
+
+
+@override_settings(EMAIL_BACKEND=QUEUED,
+                   MAILQUEUE_BACKEND="mailqueue.tests.CountingBackend")
+class QueuedEmailTest(TestCase):
+    def setUp(self):
+        CountingBackend.opened = 0
+
+    def test_send_mail_only_enqueues(self):
+        sent = mail.send_mail("Hello", "Body", "from@example.com",
+                              ["to@example.com"])
+        self.assertEqual(sent, 1)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = QueuedEmail.objects.get()
+        self.assertEqual(queued.status, QueuedEmail.PENDING)
+        self.assertEqual(queued.to, "to@example.com")
+
+    def test_message_round_trip(self):
+        message = mail.EmailMultiAlternatives(
+            "Hello", "Body", "from@example.com", ["to@example.com"],
+            cc=["cc@example.com"], headers={"X-Tag": "signup"})
+        message.attach_alternative("<p>Body</p>", "text/html")
+        message.attach("notes.txt", "some notes", "text/plain")
+        message.send()
+        deliver_batch()
+        delivered = mail.outbox[0]
+        self.assertEqual(delivered.subject, "Hello")
+        self.assertEqual(delivered.cc, ["cc@example.com"])
+        self.assertEqual(delivered.extra_headers, {"X-Tag": "signup"})
+        self.assertEqual(delivered.alternatives,
+                         [("<p>Body</p>", "text/html")])
+        self.assertEqual(delivered.attachments,
+                         [("notes.txt", "some notes", "text/plain")])
+
+    def test_mime_attachment_round_trip(self):
+        image = MIMEImage(b'\x89PNG fake image', 'png')
+        image.add_header('Content-ID', '<logo>')
+        message = mail.EmailMessage("Hello", "Body", "from@example.com",
+                                    ["to@example.com"])
+        message.attach(image)
+        message.send()
+        deliver_batch()
+        attachment = mail.outbox[0].attachments[0]
+        self.assertIsInstance(attachment, MIMEBase)
+        self.assertEqual(attachment['Content-ID'], '<logo>')
+        self.assertEqual(attachment.get_content_type(), 'image/png')
+        self.assertEqual(attachment.get_payload(decode=True),
+                         b'\x89PNG fake image')
+        self.assertIn(b'Content-ID: <logo>', mail.outbox[0].message()
+                      .as_bytes())
+
+    def test_batch_reuses_one_connection(self):
+        for i in range(5):
+            mail.send_mail(f"Hello {i}", "Body", "from@example.com",
+                           [f"user{i}@example.com"])
+        counts = deliver_batch(batch_size=10)
+        self.assertEqual(counts, {"sent": 5, "retried": 0, "dead": 0})
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertFalse(QueuedEmail.objects.exclude(
+            status=QueuedEmail.SENT).exists())
+
+    def test_claimed_messages_are_skipped(self):
+        mail.send_mail("Hello", "Body", "from@example.com",
+                       ["to@example.com"])
+        QueuedEmail.objects.update(
+            available_at=timezone.now() + timedelta(seconds=300))
+        self.assertEqual(deliver_batch()["sent"], 0)
+
+    def test_claim_returns_only_rows_it_leased(self):
+        for i in range(2):
+            mail.send_mail(f"Hello {i}", "Body", "from@example.com",
+                           [f"user{i}@example.com"])
+        rival, mine = QueuedEmail.objects.order_by("id")
+        update = QuerySet.update
+
+        def raced_update(queryset, **kwargs):
+            # Another worker leases one of the selected rows first
+            update(QueuedEmail.objects.filter(pk=rival.pk),
+                   available_at=timezone.now())
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", raced_update):
+            batch = claim(batch_size=10, lease=300)
+        self.assertEqual([queued.pk for queued in batch], [mine.pk])
+
+    @mock.patch("time.sleep")
+    def test_loop_survives_lock_errors(self, sleep):
+        results = [OperationalError("database is locked"),
+                   {"sent": 1, "retried": 0, "dead": 0}]
+        target = ("mailqueue.management.commands.send_queued_mail"
+                  ".deliver_batch")
+        # The mock raises StopIteration once the scripted results run out
+        with mock.patch(target, side_effect=results) as deliver, \
+                self.assertRaises(StopIteration):
+            call_command("send_queued_mail", "--loop",
+                         stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(deliver.call_count, 3)
+
+    @override_settings(MAILQUEUE_BACKEND="mailqueue.tests.FailingBackend")
+    def test_failures_retry_then_dead_letter(self):
+        mail.send_mail("Hello", "Body", "from@example.com",
+                       ["to@example.com"])
+        counts = deliver_batch(max_attempts=2, retry_delay=60)
+        self.assertEqual(counts["retried"], 1)
+        queued = QueuedEmail.objects.get()
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn("relay unavailable", queued.last_error)
+        self.assertGreater(queued.available_at, timezone.now())
+
+        # Not due yet
+        self.assertEqual(deliver_batch(max_attempts=2)["retried"], 0)
+        QueuedEmail.objects.update(available_at=timezone.now())
+        counts = deliver_batch(max_attempts=2)
+        self.assertEqual(counts["dead"], 1)
+        self.assertEqual(DeadLetter.objects.count(), 1)
+
+
+@override_settings(EMAIL_BACKEND=QUEUED)
+class RegistrationMailTest(APITestCase):
+    def test_registration_enqueues_verification_mail(self):
+        response = self.client.post(reverse("rest_register"), {
+            "username": "newuser",
+            "email": "new@example.com",
+            "password1": "a-strong-Passw0rd",
+            "password2": "a-strong-Passw0rd",
+        })
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(QueuedEmail.objects.get().to, "new@example.com")
+
+
+class DeadLetterAdminTest(TestCase):
+    def test_requeue_action(self):
+        admin_user = User.objects.create_superuser(
+            username="admin", password="adminpassword")
+        dead = QueuedEmail.objects.create(
+            status=QueuedEmail.DEAD, subject="Hello", to="to@example.com",
+            payload={}, attempts=5, available_at=timezone.now())
+        self.client.force_login(admin_user)
+        url = reverse("admin:mailqueue_deadletter_changelist")
+        self.assertContains(self.client.get(url), "Hello")
+        self.client.post(url, {"action": "requeue",
+                               "_selected_action": [dead.pk]})
+        dead.refresh_from_db()
+        self.assertEqual(dead.status, QueuedEmail.PENDING)
+        self.assertEqual(dead.attempts, 0)
@@ -0,0 +1,84 @@
+"""Deliver queued mail in batches over one backend connection."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+
+def delivery_backend():
+    return getattr(settings, "MAILQUEUE_BACKEND",
+                   "django.core.mail.backends.smtp.EmailBackend")
+
+
+def claim(batch_size, lease):
+    """Lease up to ``batch_size`` due messages to this worker.
+
+    The lease pushes ``available_at`` forward, so another worker skips
+    the rows, and a worker that dies mid-batch only delays them. Only
+    rows carrying this worker's exact lease are returned: a row another
+    worker leased between the select and the update is not ours.
+    """
+    now = timezone.now()
+    leased_until = now + timedelta(seconds=lease)
+    with transaction.atomic():
+        ids = list(QueuedEmail.objects
+                   .filter(status=QueuedEmail.PENDING, available_at__lte=now)
+                   .order_by("available_at", "id")
+                   .values_list("id", flat=True)[:batch_size])
+        QueuedEmail.objects.filter(id__in=ids, available_at__lte=now) \
+            .update(available_at=leased_until)
+    return list(QueuedEmail.objects
+                .filter(id__in=ids, status=QueuedEmail.PENDING,
+                        available_at=leased_until)
+                .order_by("id"))
+
+
+def deliver_batch(batch_size=100, max_attempts=5, lease=300,
+                  retry_delay=60):
+    """Send one batch; return ``{"sent": n, "retried": n, "dead": n}``."""
+    batch = claim(batch_size, lease)
+    counts = {"sent": 0, "retried": 0, "dead": 0}
+    if not batch:
+        return counts
+
+    now = timezone.now()
+    connection = get_connection(delivery_backend())
+    try:
+        connection.open()
+    except Exception as exc:
+        for queued in batch:
+            counts[failed(queued, exc, now, max_attempts, retry_delay)] += 1
+    else:
+        try:
+            for queued in batch:
+                try:
+                    connection.send_messages([queued.to_message(connection)])
+                except Exception as exc:
+                    counts[failed(queued, exc, now, max_attempts,
+                                  retry_delay)] += 1
+                else:
+                    queued.status = QueuedEmail.SENT
+                    queued.sent_at = timezone.now()
+                    counts["sent"] += 1
+        finally:
+            connection.close()
+    QueuedEmail.objects.bulk_update(
+        batch, ["status", "attempts", "last_error", "available_at",
+                "sent_at"])
+    return counts
+
+
+def failed(queued, exc, now, max_attempts, retry_delay):
+    queued.attempts += 1
+    queued.last_error = f"{type(exc).__name__}: {exc}"
+    if queued.attempts >= max_attempts:
+        queued.status = QueuedEmail.DEAD
+        return "dead"
+    # Exponential backoff: retry_delay, 2x, 4x, ...
+    delay = retry_delay * 2 ** (queued.attempts - 1)
+    queued.available_at = now + timedelta(seconds=delay)
+    return "retried"
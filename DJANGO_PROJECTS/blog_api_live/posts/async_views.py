@@ -0,0 +1,223 @@
+"""Async-native post endpoints for ASGI deployments.
+
+DRF views are sync, so under an ASGI server every request to
+``PostList``/``PostDetail`` hops through ``sync_to_async``. These views
+are plain async Django views with the same payloads and permissions.
+They use the async ORM (``aiterator``, ``aget``, ``acreate``, ``asave``)
+and async token authentication, so a cached-token or signed-token read
+never leaves the event loop.
+"""
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.authentication import CSRFCheck
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from accounts.authentication import (CachedTokenAuthentication,
+                                     SignedTokenAuthentication)
+from .conditional import (detail_validators, list_validators,
+                          not_modified, set_validators)
+from .models import Post, PostTombstone
+from .pagination import KeysetPagination
+from .permissions import IsAuthorOrReadOnly
+from .serializers import PostSerializer, project_queryset
+from .throttling import IPSlidingWindowThrottle, UserSlidingWindowThrottle
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), status=status_code,
+                        content_type="application/json")
+
+
+def error_response(exc):
+    # As DRF's exception handler: field errors are the payload itself
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+    response = json_response(data, exc.status_code)
+    if getattr(exc, "wait", None):
+        response["Retry-After"] = "%d" % exc.wait
+    return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncPostView(View):
+    permission_classes = (IsAuthorOrReadOnly, )
+    authentication_classes = (CachedTokenAuthentication,
+                              SignedTokenAuthentication)
+    parser_classes = (JSONParser, FormParser, MultiPartParser)
+    throttle_classes = (UserSlidingWindowThrottle, IPSlidingWindowThrottle)
+
+    async def dispatch(self, request, *args, **kwargs):
+        # DRF's Request only wraps parsing and query_params here; its
+        # (sync) authentication is never triggered.
+        self.api_request = Request(
+            request, parsers=[parser() for parser in self.parser_classes])
+        try:
+            await self.authenticate(request)
+            for permission in self.get_permissions():
+                if not await permission.ahas_permission(request, self):
+                    raise exceptions.PermissionDenied()
+            # The counters live in a local SQLite file: off the event loop
+            await sync_to_async(self.check_throttles)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except (exceptions.NotAuthenticated,
+                exceptions.AuthenticationFailed) as exc:
+            # As DRF does when SessionAuthentication is listed first
+            exc.status_code = status.HTTP_403_FORBIDDEN
+            return error_response(exc)
+        except exceptions.APIException as exc:
+            return error_response(exc)
+
+    async def authenticate(self, request):
+        for authentication_class in self.authentication_classes:
+            result = await authentication_class().aauthenticate(request)
+            if result is not None:
+                request.user = result[0]
+                return
+        # Session fallback: resolve the lazy user off the event loop
+        is_authenticated = await sync_to_async(
+            lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            raise exceptions.NotAuthenticated()
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            self.enforce_csrf(request)
+
+    def enforce_csrf(self, request):
+        check = CSRFCheck(lambda req: None)
+        check.process_request(request)
+        reason = check.process_view(request, None, (), {})
+        if reason:
+            raise exceptions.PermissionDenied(f"CSRF Failed: {reason}")
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    def check_throttles(self, request):
+        """Same scopes and counters as the sync ``PostList``/``PostDetail``."""
+        waits = [throttle.wait() for throttle in
+                 (throttle_class() for throttle_class in self.throttle_classes)
+                 if not throttle.allow_request(request, self)]
+        if waits:
+            raise exceptions.Throttled(max(waits))
+
+    async def check_object_permissions(self, obj):
+        for permission in self.get_permissions():
+            if not await permission.ahas_object_permission(
+                    self.request, self, obj):
+                raise exceptions.PermissionDenied()
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs["context"] = {"request": self.api_request, "view": self}
+        return PostSerializer(*args, **kwargs)
+
+    def validate(self, serializer):
+        try:
+            serializer.is_valid(raise_exception=True)
+        except exceptions.ValidationError as exc:
+            return json_response(exc.detail, status.HTTP_400_BAD_REQUEST)
+        return None
+
+
+class AsyncPostList(AsyncPostView):
+    http_method_names = ["get", "post", "options"]
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Post.objects.select_related("author")
+        if not user.is_superuser:
+            queryset = queryset.filter(author=user)
+        return project_queryset(queryset, self.api_request)
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        etag, last_modified = await sync_to_async(list_validators)(
+            queryset, request)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        paginator = KeysetPagination()
+        serializer = self.get_serializer()
+        if paginator.is_requested(self.api_request):
+            rows = [post async for post in
+                    paginator.page_queryset(queryset, self.api_request)
+                    .aiterator()]
+            page = paginator.set_page(rows)
+            response = json_response({
+                "next": paginator.get_next_link(),
+                "results": [serializer.to_representation(post)
+                            for post in page],
+            })
+        else:
+            response = json_response([serializer.to_representation(post)
+                                      async for post in queryset.aiterator()])
+        return set_validators(response, etag, last_modified)
+
+    async def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=self.api_request.data)
+        invalid = self.validate(serializer)
+        if invalid is not None:
+            return invalid
+        post = await Post.objects.acreate(author=request.user,
+                                          **serializer.validated_data)
+        return json_response(self.get_serializer(post).data,
+                             status.HTTP_201_CREATED)
+
+
+class AsyncPostDetail(AsyncPostView):
+    http_method_names = ["get", "put", "patch", "delete", "options"]
+
+    async def get_object(self, pk):
+        queryset = project_queryset(Post.objects.select_related("author"),
+                                    self.api_request)
+        try:
+            post = await queryset.aget(pk=pk)
+        except Post.DoesNotExist:
+            raise exceptions.NotFound()
+        await self.check_object_permissions(post)
+        return post
+
+    async def get(self, request, pk, *args, **kwargs):
+        post = await self.get_object(pk)
+        etag, last_modified = detail_validators(post, request)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        response = json_response(self.get_serializer(post).data)
+        return set_validators(response, etag, last_modified)
+
+    async def put(self, request, pk, *args, **kwargs):
+        return await self.update(pk, partial=False)
+
+    async def patch(self, request, pk, *args, **kwargs):
+        return await self.update(pk, partial=True)
+
+    async def update(self, pk, partial):
+        post = await self.get_object(pk)
+        serializer = self.get_serializer(post, data=self.api_request.data,
+                                         partial=partial)
+        invalid = self.validate(serializer)
+        if invalid is not None:
+            return invalid
+        for attr, value in serializer.validated_data.items():
+            setattr(post, attr, value)
+        await post.asave()
+        return json_response(self.get_serializer(post).data)
+
+    async def delete(self, request, pk, *args, **kwargs):
+        post = await self.get_object(pk)
+        await sync_to_async(self.destroy)(post)
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+    def destroy(self, post):
+        # There is no async transaction API, so this one step runs sync
+        with transaction.atomic():
+            PostTombstone.record([post])
+            post.delete()
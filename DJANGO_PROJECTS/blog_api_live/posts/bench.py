@@ -0,0 +1,92 @@
+"""Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks run inside the test environment against a throwaway test
+database, so they never touch ``db.sqlite3``.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import (override_settings, setup_databases,
+                               setup_test_environment, teardown_databases,
+                               teardown_test_environment)
+
+from .models import Post
+
+
+@contextmanager
+def temporary_database(name=None):
+    """Run inside a throwaway test database.
+
+    SQLite test databases live in memory unless ``name`` gives a file
+    path; a file is needed when a server thread must see the data.
+    """
+    if name is not None:
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = name
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    # Benchmarks measure the endpoints, not the rate limits
+    rates = {scope: None for scope in
+             settings.REST_FRAMEWORK.get("DEFAULT_THROTTLE_RATES", {})}
+    unthrottled = override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates})
+    unthrottled.enable()
+    try:
+        yield
+    finally:
+        unthrottled.disable()
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def seed_users(count, prefix="bench"):
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f"{prefix}{i}") for i in range(count)
+    )
+    return list(User.objects.filter(username__startswith=prefix)
+                .order_by("id"))
+
+
+def seed_posts(count, authors, batch_size=5000, body="x" * 500):
+    """Insert ``count`` posts round-robin over ``authors``."""
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        Post.objects.bulk_create(
+            Post(title=f"Post {created + i}", body=body,
+                 author=authors[(created + i) % len(authors)])
+            for i in range(size)
+        )
+        created += size
+
+
+def measure(func, repeat=50):
+    """Call ``func`` ``repeat`` times and summarise latencies in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        "count": len(timings),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+    }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = round(pct / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
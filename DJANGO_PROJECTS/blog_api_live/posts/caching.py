@@ -0,0 +1,95 @@
+"""Rendered-response cache for ``PostList``.
+
+Entries hold the rendered JSON bytes for one scope (``all`` for
+superusers, ``user:<id>`` for everyone else) and one URL. Each scope has
+a version counter that the ``posts.signals`` receivers bump whenever a
+post in it (or its author) is saved or deleted, which orphans every entry
+of that scope at once. The list ETag is part of the key too, so a write
+that skips signals (``queryset.update()``, raw SQL) can never be served
+stale.
+
+The backend is the ``POST_LIST_CACHE`` alias in ``CACHES``; hit and miss
+counters live in the same backend so every worker sharing it reports
+into them.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = "posts:list"
+ALL_SCOPE = "all"
+
+
+def get_cache():
+    return caches[getattr(settings, "POST_LIST_CACHE", "default")]
+
+
+def cache_timeout():
+    return getattr(settings, "POST_LIST_CACHE_TTL", 300)
+
+
+def user_scope(user):
+    return ALL_SCOPE if user.is_superuser else f"user:{user.pk}"
+
+
+def _version_key(scope):
+    return f"{KEY_PREFIX}:version:{scope}"
+
+
+def _incr(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing counter: the next ``add`` (or a racing one) starts it
+        cache.add(key, 1, timeout=None)
+
+
+def invalidate_authors(author_ids):
+    """Orphan the cached lists of ``author_ids`` and the superuser list."""
+    cache = get_cache()
+    scopes = {ALL_SCOPE} | {f"user:{pk}" for pk in author_ids}
+    for scope in scopes:
+        _incr(cache, _version_key(scope))
+
+
+def is_cacheable(request):
+    return getattr(request, "accepted_renderer", None) is not None \
+        and request.accepted_renderer.format == "json"
+
+
+def response_key(request, etag):
+    scope = user_scope(request.user)
+    version = get_cache().get(_version_key(scope), 0)
+    digest = hashlib.sha1("|".join((
+        request.build_absolute_uri(), request.accepted_media_type, etag,
+    )).encode()).hexdigest()
+    return f"{KEY_PREFIX}:{scope}:{version}:{digest}"
+
+
+def lookup(key):
+    """Return the cached ``(content, content_type)`` for ``key`` or None."""
+    cache = get_cache()
+    entry = cache.get(key)
+    _incr(cache, f"{KEY_PREFIX}:{'hits' if entry else 'misses'}")
+    return entry
+
+
+def store(key, response):
+    if response.status_code == 200:
+        get_cache().set(key, (response.content, response["Content-Type"]),
+                        cache_timeout())
+
+
+def stats():
+    cache = get_cache()
+    counts = cache.get_many([f"{KEY_PREFIX}:hits", f"{KEY_PREFIX}:misses"])
+    hits = counts.get(f"{KEY_PREFIX}:hits", 0)
+    misses = counts.get(f"{KEY_PREFIX}:misses", 0)
+    total = hits + misses
+    return {"hits": hits, "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else None}
+
+
+def reset_stats():
+    get_cache().delete_many([f"{KEY_PREFIX}:hits", f"{KEY_PREFIX}:misses"])
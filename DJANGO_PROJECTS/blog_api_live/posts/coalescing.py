@@ -0,0 +1,153 @@
+"""Single-flight coalescing of identical concurrent reads in a worker.
+
+When many requests for the same resource arrive together, the first
+(the leader) computes the rendered response and the rest wait for it
+and share the bytes. Each request still gets its own conditional check
+against the shared ETag, so a matching ``If-None-Match`` is still a 304.
+
+An optional micro-TTL (``POST_COALESCE_TTL`` seconds, 0 by default)
+keeps a finished result around briefly for requests that arrive just
+after it completes. A post write in this worker drops those results;
+in other workers it can be invisible for at most that long.
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.response import Response
+
+from .conditional import not_modified, set_validators
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    # Seconds a follower waits before computing the result itself
+    timeout = 30
+    max_recent = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._recent = {}
+        self.reset_stats()
+
+    def do(self, key, func, ttl=0):
+        """Return ``func()``, sharing one call among concurrent callers."""
+        now = time.monotonic()
+        with self._lock:
+            recent = self._recent.get(key)
+            if recent is not None and recent[0] > now:
+                self.ttl_hits += 1
+                return recent[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.computed += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            if call.done.wait(self.timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.value
+            with self._lock:
+                self.timeouts += 1
+            return func()
+
+        try:
+            call.value = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if ttl and call.error is None:
+                    self.remember(key, call.value, time.monotonic() + ttl)
+            call.done.set()
+        return call.value
+
+    def remember(self, key, value, expires):
+        if len(self._recent) >= self.max_recent:
+            now = time.monotonic()
+            self._recent = {k: entry for k, entry in self._recent.items()
+                            if entry[0] > now}
+        self._recent[key] = (expires, value)
+
+    def forget(self):
+        """Drop every micro-TTL result (in-flight calls are unaffected)."""
+        with self._lock:
+            self._recent = {}
+
+    def stats(self):
+        with self._lock:
+            return {"computed": self.computed, "collapsed": self.collapsed,
+                    "ttl_hits": self.ttl_hits, "timeouts": self.timeouts}
+
+    def reset_stats(self):
+        self.computed = self.collapsed = self.ttl_hits = self.timeouts = 0
+
+
+flights = SingleFlight()
+
+
+def micro_ttl():
+    return getattr(settings, "POST_COALESCE_TTL", 0)
+
+
+def request_key(request, name):
+    return (name, request.build_absolute_uri(),
+            request.accepted_media_type)
+
+
+class SharedResponse(Response):
+    """A DRF response whose bytes were rendered once, by the leader.
+
+    ``data`` is shared between requests and must not be modified. Pass
+    ``data=None`` when only the (JSON) bytes are at hand, as on a
+    response cache hit; ``data`` is then decoded from them on first use.
+    """
+
+    def __init__(self, data, content, content_type, **kwargs):
+        self.shared_content = content
+        super().__init__(data, **kwargs)
+        self.shared_content_type = content_type
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = json.loads(self.shared_content)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        self["Content-Type"] = self.shared_content_type
+        return self.shared_content
+
+
+def respond(request, key, compute):
+    """Answer ``request`` from a shared ``compute()``.
+
+    ``compute`` returns ``(data, content, content_type, etag,
+    last_modified)``; ``data`` may be ``None`` (see ``SharedResponse``).
+    """
+    data, content, content_type, etag, last_modified = flights.do(
+        key, compute, micro_ttl())
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+    response = SharedResponse(data, content, content_type)
+    return set_validators(response, etag, last_modified)
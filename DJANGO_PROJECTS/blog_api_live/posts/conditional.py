@@ -0,0 +1,113 @@
+"""ETag / Last-Modified validators for the posts endpoints.
+
+Validators are computed from ``updated_at`` (plus the author's name when
+``?expand=author`` renders it), so a matching ``If-None-Match`` or
+``If-Modified-Since`` is answered with a 304 before any serializer is
+built. Lists send no ``Last-Modified``: deleting a post that is not the
+newest does not move ``max(updated_at)``.
+"""
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def _digest(*parts):
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _stamp(post):
+    """``(id, updated_at)`` of a model instance or a ``.values()`` row."""
+    if isinstance(post, dict):
+        return post["id"], post["updated_at"]
+    return post.pk, post.updated_at
+
+
+def _author_stamp(post):
+    """The ``author_detail`` values of ``post``, if they were loaded.
+
+    They are loaded exactly when ``author_detail`` is rendered: the
+    ``author__*`` columns of a ``.values()`` row, or the
+    ``select_related`` author of a model instance.
+    """
+    if isinstance(post, dict):
+        if "author__username" not in post:
+            return ()
+        return post["author__username"], post["author__name"]
+    author = post._state.fields_cache.get("author")
+    if author is None:
+        return ()
+    return author.username, author.name
+
+
+def _expands_author(request):
+    return "author" in request.GET.get("expand", "").split(",")
+
+
+def detail_validators(post, request):
+    """Strong ETag from ``id`` and ``updated_at`` for a single post.
+
+    ``post`` is a model instance or a ``.values()`` row. The query
+    string is folded in because ``?expand=`` and friends change the
+    representation, and so is the embedded author, which can change
+    without the post's ``updated_at`` moving.
+    """
+    pk, updated_at = _stamp(post)
+    etag = '"%s"' % _digest(pk, updated_at.isoformat(), *_author_stamp(post),
+                            request.META.get("QUERY_STRING", ""))
+    return etag, updated_at
+
+
+def list_validators(queryset, request):
+    """Weak ETag from ``max(updated_at)`` and ``count`` over ``queryset``.
+
+    Costs one aggregate query; inserts, edits and deletes all move at
+    least one of the two values. With ``?expand=author`` a second query
+    folds in the names of the authors on the list. There is no
+    ``Last-Modified`` (returned as ``None``).
+    """
+    queryset = queryset.order_by()
+    stats = queryset.aggregate(latest=Max("updated_at"), count=Count("id"))
+    latest = stats["latest"]
+    authors = ()
+    if _expands_author(request):
+        authors = (get_user_model().objects
+                   .filter(pk__in=queryset.values("author_id"))
+                   .order_by("pk").values_list("pk", "username", "name"))
+    etag = 'W/"%s"' % _digest(latest.isoformat() if latest else "",
+                              stats["count"], *authors,
+                              request.META.get("QUERY_STRING", ""))
+    return etag, None
+
+
+def multi_validators(posts, request):
+    """Weak ETag over the ``id``/``updated_at`` pairs of ``posts``.
+
+    For ``?ids=`` reads, where the rows are already loaded. Like lists,
+    there is no ``Last-Modified``: a deleted id would not move it.
+    """
+    stamps = sorted((*_stamp(post), *_author_stamp(post)) for post in posts)
+    etag = 'W/"%s"' % _digest(
+        *("@".join(str(part) for part in stamp) for stamp in stamps),
+        request.META.get("QUERY_STRING", ""))
+    return etag, None
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 response if the request's validators match."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,213 @@
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.core.servers.basehttp import ThreadedWSGIServer
+from django.test.testcases import QuietWSGIRequestHandler
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from posts import coalescing
+from posts.bench import seed_posts, summarize, temporary_database
+from posts.models import Post
+
+PASSWORD = "bench-password"
+
+
+class Command(BaseCommand):
+    help = ("Seed users and posts, start a local server and load-test the "
+            "api/v1/ endpoints. Prints throughput and latency as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--requests", type=int, default=500,
+                            help="Requests per scenario.")
+        parser.add_argument("--login-requests", type=int, default=50,
+                            help="Login requests (each hashes a password).")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--scenarios", default=(
+            "list,list_page,detail,hot_detail,create,update,delete,login"))
+        parser.add_argument("--output", help="Also write the JSON here.")
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options["scenarios"].split(",")
+                     if name.strip()]
+        for name in scenarios:
+            if not hasattr(self, f"scenario_{name}"):
+                self.stderr.write(f"Unknown scenario: {name}")
+                return
+
+        report = {
+            "revision": self.revision(),
+            "users": options["users"],
+            "posts": options["posts"],
+            "concurrency": options["concurrency"],
+            "scenarios": {},
+        }
+        with tempfile.TemporaryDirectory() as directory, \
+                temporary_database(os.path.join(directory, "bench.sqlite3")):
+            self.seed(options)
+            server = ThreadedWSGIServer(("127.0.0.1", 0),
+                                        QuietWSGIRequestHandler)
+            server.set_app(WSGIHandler())
+            thread = threading.Thread(target=server.serve_forever,
+                                      daemon=True)
+            thread.start()
+            self.address = server.server_address
+            try:
+                with override_settings(ALLOWED_HOSTS=["127.0.0.1"]):
+                    for name in scenarios:
+                        count = (options["login_requests"] if name == "login"
+                                 else options["requests"])
+                        request_for = getattr(self, f"scenario_{name}")(count)
+                        coalescing.flights.reset_stats()
+                        report["scenarios"][name] = self.run(
+                            request_for, count, options["concurrency"])
+                        report["scenarios"][name]["coalescing"] = (
+                            coalescing.flights.stats())
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                handle.write(output + "\n")
+        self.stdout.write(output)
+
+    def seed(self, options):
+        User = get_user_model()
+        # One hash shared by every user keeps seeding fast
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            User(username=f"bench{i}", password=password)
+            for i in range(options["users"])
+        )
+        self.users = list(User.objects.filter(username__startswith="bench")
+                          .order_by("id"))
+        Token.objects.bulk_create(Token(user=user, key=Token.generate_key())
+                                  for user in self.users)
+        self.tokens = dict(Token.objects.values_list("user_id", "key"))
+        seed_posts(options["posts"], self.users)
+        self.post_ids = {}
+        for pk, author_id in Post.objects.values_list("pk", "author_id"):
+            self.post_ids.setdefault(author_id, []).append(pk)
+        self.created = []
+
+    # Each scenario returns ``request_for(i) -> (method, path, body, key)``
+    # for the i-th request.
+
+    def own_post(self, i):
+        user = self.users[i % len(self.users)]
+        posts = self.post_ids[user.pk]
+        return posts[(i // len(self.users)) % len(posts)], user
+
+    def scenario_list(self, count):
+        return lambda i: ("GET", "/api/v1/", None,
+                          self.tokens[self.users[i % len(self.users)].pk])
+
+    def scenario_list_page(self, count):
+        return lambda i: ("GET", "/api/v1/?page_size=50", None,
+                          self.tokens[self.users[i % len(self.users)].pk])
+
+    def scenario_detail(self, count):
+        def request_for(i):
+            pk, user = self.own_post(i)
+            return "GET", f"/api/v1/{pk}/", None, self.tokens[user.pk]
+        return request_for
+
+    def scenario_hot_detail(self, count):
+        # Every request reads the same post: exercises coalescing
+        pk, user = self.own_post(0)
+        return lambda i: ("GET", f"/api/v1/{pk}/", None,
+                          self.tokens[self.users[i % len(self.users)].pk])
+
+    def scenario_create(self, count):
+        def request_for(i):
+            user = self.users[i % len(self.users)]
+            body = {"title": f"Bench {i}", "body": "x" * 500}
+            return "POST", "/api/v1/", body, self.tokens[user.pk]
+        return request_for
+
+    def scenario_update(self, count):
+        def request_for(i):
+            pk, user = self.own_post(i)
+            return ("PATCH", f"/api/v1/{pk}/", {"title": f"Updated {i}"},
+                    self.tokens[user.pk])
+        return request_for
+
+    def scenario_delete(self, count):
+        # Delete what ``create`` made, so the seeded set stays intact;
+        # top up with fresh posts if it has not run.
+        victims = self.created[:count]
+        if len(victims) < count:
+            fresh = [Post(title="Victim", body="x",
+                          author=self.users[i % len(self.users)])
+                     for i in range(count - len(victims))]
+            victims += [(post.pk, post.author_id) for post in
+                        Post.objects.bulk_create(fresh)]
+        return lambda i: ("DELETE", f"/api/v1/{victims[i][0]}/", None,
+                          self.tokens[victims[i][1]])
+
+    def scenario_login(self, count):
+        return lambda i: ("POST", "/api/v1/dj-rest-auth/login/", {
+            "username": self.users[i % len(self.users)].username,
+            "password": PASSWORD,
+        }, None)
+
+    def run(self, request_for, count, concurrency):
+        requests = [request_for(i) for i in range(count)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(self.send, requests))
+        elapsed = time.perf_counter() - start
+
+        statuses = {}
+        for _, code, body in results:
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+            if code == 201 and body.get("id"):
+                self.created.append((body["id"], body["author"]))
+        stats = summarize([latency for latency, _, _ in results])
+        stats["errors"] = sum(1 for _, code, _ in results if code >= 400)
+        stats["statuses"] = statuses
+        stats["seconds"] = round(elapsed, 3)
+        stats["requests_per_second"] = round(count / elapsed, 1)
+        return stats
+
+    def send(self, request):
+        method, path, body, key = request
+        headers = {"Content-Type": "application/json"}
+        if key:
+            headers["Authorization"] = f"Token {key}"
+        payload = json.dumps(body) if body is not None else None
+        start = time.perf_counter()
+        connection = HTTPConnection(*self.address, timeout=60)
+        try:
+            connection.request(method, path, payload, headers)
+            response = connection.getresponse()
+            content = response.read()
+        finally:
+            connection.close()
+        latency = (time.perf_counter() - start) * 1000
+        data = {}
+        if method == "POST" and content:
+            data = json.loads(content)
+        return latency, response.status, data
+
+    def revision(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from rest_framework.authtoken.models import Token
+
+from posts.bench import seed_posts, summarize, temporary_database
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ("Compare requests/sec and latency of the sync DRF post views "
+            "under the WSGI and ASGI handlers with the async views.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--posts", type=int, default=20)
+
+    def handle(self, *args, **options):
+        results = {}
+        with temporary_database():
+            user = get_user_model().objects.create_user(username="bench")
+            seed_posts(options["posts"], [user])
+            token = Token.objects.create(user=user).key
+            pk = Post.objects.values_list("pk", flat=True).first()
+            endpoints = {
+                "list": ("/api/v1/", "/api/v1/async/"),
+                "detail": (f"/api/v1/{pk}/", f"/api/v1/async/{pk}/"),
+            }
+            for name, (sync_path, async_path) in endpoints.items():
+                results[name] = {
+                    "wsgi_sync_view": self.run_wsgi(sync_path, token,
+                                                    options),
+                    "asgi_sync_view": self.run_asgi(sync_path, token,
+                                                    options),
+                    "asgi_async_view": self.run_asgi(async_path, token,
+                                                     options),
+                }
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_wsgi(self, path, token, options):
+        def worker(count):
+            client = Client(headers={"Authorization": f"Token {token}"})
+            timings = []
+            for _ in range(count):
+                start = time.perf_counter()
+                response = client.get(path)
+                timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.status_code
+            return timings
+
+        concurrency = options["concurrency"]
+        shares = self.split(options["requests"], concurrency)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = [t for chunk in pool.map(worker, shares)
+                       for t in chunk]
+        return self.report(timings, time.perf_counter() - start)
+
+    def run_asgi(self, path, token, options):
+        async def worker(count):
+            client = AsyncClient()
+            headers = {"Authorization": f"Token {token}"}
+            timings = []
+            for _ in range(count):
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.status_code
+            return timings
+
+        async def main():
+            shares = self.split(options["requests"], options["concurrency"])
+            chunks = await asyncio.gather(*(worker(n) for n in shares))
+            return [t for chunk in chunks for t in chunk]
+
+        start = time.perf_counter()
+        timings = asyncio.run(main())
+        return self.report(timings, time.perf_counter() - start)
+
+    def split(self, total, parts):
+        return [total // parts + (1 if i < total % parts else 0)
+                for i in range(parts)]
+
+    def report(self, timings, elapsed):
+        stats = summarize(timings)
+        stats["requests_per_second"] = round(len(timings) / elapsed, 1)
+        return stats
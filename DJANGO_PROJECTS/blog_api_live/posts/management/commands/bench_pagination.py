@@ -0,0 +1,62 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from posts.bench import measure, seed_posts, temporary_database
+from posts.models import Post
+from posts.pagination import KeysetPagination
+from posts.views import PostList
+
+
+class Command(BaseCommand):
+    help = "Measure keyset page latency of PostList at growing table sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,100000,1000000",
+                            help="Comma separated post counts.")
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        results = []
+        with temporary_database():
+            admin = get_user_model().objects.create_superuser(
+                username="bench-admin", password="bench")
+            for size in sizes:
+                seed_posts(size - Post.objects.count(), [admin])
+                results.append(self.bench_size(admin, size, options))
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def bench_size(self, admin, size, options):
+        factory = APIRequestFactory()
+        view = PostList.as_view()
+        paginator = KeysetPagination()
+        page_size = options["page_size"]
+        ordered = Post.objects.order_by(*paginator.ordering)
+
+        def page_at(offset):
+            params = {"page_size": page_size}
+            if offset:
+                anchor = ordered[offset - 1]
+                params["cursor"] = paginator.encode_cursor(
+                    *paginator.get_position(anchor))
+            request = factory.get("/api/v1/", params)
+
+            def run():
+                force_authenticate(request, user=admin)
+                response = view(request)
+                response.render()
+
+            return measure(run, options["repeat"])
+
+        last = max(size - page_size, 0)
+        return {
+            "posts": size,
+            "page_size": page_size,
+            "first_page": page_at(0),
+            "middle_page": page_at(last // 2),
+            "last_page": page_at(last),
+        }
@@ -0,0 +1,71 @@
+import json
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Case, FloatField, Q, Value, When
+
+from posts.bench import measure, temporary_database
+from posts.models import Post
+from posts.search import BODY_WEIGHT, TITLE_WEIGHT, search_post_ids
+
+WORDS = ("alpha bravo charlie delta echo foxtrot golf hotel india juliet "
+         "kilo lima mike november oscar papa quebec romeo sierra tango "
+         "uniform victor whiskey xray yankee zulu").split()
+
+
+def like_search_ids(term, limit):
+    """Rank every LIKE match with the bm25 column weights, then cut.
+
+    Like the FTS5 search, it orders all matches before applying the
+    limit, so it cannot stop at the first ``limit`` rows it meets.
+    """
+    def weight(field, value):
+        return Case(When(**{f"{field}__icontains": term}, then=Value(value)),
+                    default=Value(0.0), output_field=FloatField())
+
+    return list(Post.objects
+                .filter(Q(title__icontains=term) | Q(body__icontains=term))
+                .annotate(rank=weight("title", TITLE_WEIGHT)
+                          + weight("body", BODY_WEIGHT))
+                .order_by("-rank", "-id")
+                .values_list("id", flat=True)[:limit])
+
+
+class Command(BaseCommand):
+    help = "Compare FTS5 search with ranked LIKE (icontains) scans over posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--limit", type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        # A rare term (in ~0.1% of posts) and a common one
+        terms = {"rare": "zanzibar", "common": "alpha"}
+        results = {"posts": options["posts"]}
+        with temporary_database():
+            author = get_user_model().objects.create_user(username="bench")
+            self.seed(options["posts"], author, rng, terms["rare"])
+            limit = options["limit"]
+            for label, term in terms.items():
+                results[label] = {
+                    "term": term,
+                    "fts5": measure(lambda: search_post_ids(
+                        term, limit=limit), options["repeat"]),
+                    "like": measure(lambda: like_search_ids(term, limit),
+                                    options["repeat"]),
+                }
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def seed(self, count, author, rng, rare_term, batch_size=5000):
+        for start in range(0, count, batch_size):
+            posts = []
+            for i in range(start, min(start + batch_size, count)):
+                words = rng.choices(WORDS, k=80)
+                if i % 1000 == 999:
+                    words[rng.randrange(len(words))] = rare_term
+                posts.append(Post(title=" ".join(words[:4]), author=author,
+                                  body=" ".join(words)))
+            Post.objects.bulk_create(posts)
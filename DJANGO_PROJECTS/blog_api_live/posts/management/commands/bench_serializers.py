@@ -0,0 +1,76 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from posts import caching
+from posts.bench import measure, seed_posts, temporary_database
+from posts.models import Post
+from posts.serializers import (PostSerializer, PostValuesSerializer,
+                               project_queryset)
+from posts.views import PostList
+
+
+class Command(BaseCommand):
+    help = ("Compare PostSerializer with the .values() fast path for a "
+            "list of --rows posts, serializer-only and end to end.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=30)
+
+    def handle(self, *args, **options):
+        results = {}
+        with temporary_database():
+            user = get_user_model().objects.create_user(
+                username="bench", name="Bench Author")
+            seed_posts(options["rows"], [user])
+            factory = APIRequestFactory()
+            for query in ("", "?expand=author"):
+                request = factory.get("/api/v1/" + query)
+                force_authenticate(request, user=user)
+                results[query or "default"] = {
+                    "serializer_only": self.serializer_only(
+                        Request(request), options["repeat"]),
+                    "view": self.view(request, options["repeat"]),
+                }
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def serializer_only(self, request, repeat):
+        queryset = project_queryset(
+            Post.objects.filter(author=request.user)
+            .select_related("author"), request)
+
+        def model():
+            PostSerializer(queryset.all(), many=True,
+                           context={"request": request}).data
+
+        def values():
+            serializer = PostValuesSerializer(request)
+            [serializer.to_representation(row)
+             for row in serializer.values(queryset)]
+
+        return self.compare(model, values, repeat)
+
+    def view(self, request, repeat):
+        def call(view):
+            def run():
+                caching.get_cache().clear()
+                view(request).render()
+            return run
+
+        return self.compare(
+            call(PostList.as_view(use_values_serializer=False)),
+            call(PostList.as_view(use_values_serializer=True)), repeat)
+
+    def compare(self, model, values, repeat):
+        model_stats = measure(model, repeat)
+        values_stats = measure(values, repeat)
+        return {
+            "model_serializer": model_stats,
+            "values_serializer": values_stats,
+            "speedup_p50": round(model_stats["p50_ms"]
+                                 / values_stats["p50_ms"], 2),
+        }
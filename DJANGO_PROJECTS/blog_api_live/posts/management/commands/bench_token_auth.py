@@ -0,0 +1,74 @@
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from accounts.authentication import (CachedTokenAuthentication,
+                                     SignedTokenAuthentication, token_cache)
+from accounts.tokens import issue_tokens
+from posts.bench import seed_posts, temporary_database
+from posts.models import Post
+from posts.views import PostDetail, PostList
+
+
+class Command(BaseCommand):
+    help = ("Compare PostList/PostDetail throughput with TokenAuthentication, "
+            "CachedTokenAuthentication and SignedTokenAuthentication.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--posts", type=int, default=20)
+
+    def handle(self, *args, **options):
+        results = {}
+        # Measure authentication, not PostList's response cache
+        no_list_cache = override_settings(
+            CACHES={**settings.CACHES, "bench_no_cache": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+            POST_LIST_CACHE="bench_no_cache")
+        with temporary_database(), no_list_cache:
+            user = get_user_model().objects.create_user(username="bench")
+            seed_posts(options["posts"], [user])
+            token = Token.objects.create(user=user)
+            access = issue_tokens(user)["access"]
+            backends = {
+                "token": (TokenAuthentication, f"Token {token.key}"),
+                "cached_token": (CachedTokenAuthentication,
+                                 f"Token {token.key}"),
+                "signed_token": (SignedTokenAuthentication,
+                                 f"Bearer {access}"),
+            }
+            pk = Post.objects.values_list("pk", flat=True).first()
+            targets = {
+                "PostList": (PostList, "/api/v1/", {}),
+                "PostDetail": (PostDetail, f"/api/v1/{pk}/", {"pk": pk}),
+            }
+            for name, (view_class, path, kwargs) in targets.items():
+                for label, (backend, header) in backends.items():
+                    token_cache.clear()
+                    view = view_class.as_view(
+                        authentication_classes=[backend])
+                    results[f"{name}/{label}"] = self.throughput(
+                        view, path, kwargs, header, options["requests"])
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def throughput(self, view, path, kwargs, header, count):
+        factory = APIRequestFactory()
+        start = time.perf_counter()
+        for _ in range(count):
+            request = factory.get(path, HTTP_AUTHORIZATION=header)
+            response = view(request, **kwargs)
+            response.render()
+            assert response.status_code == 200, response.status_code
+        elapsed = time.perf_counter() - start
+        return {
+            "requests": count,
+            "seconds": round(elapsed, 3),
+            "requests_per_second": round(count / elapsed, 1),
+        }
@@ -9,6 +9,36 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"],
+                        name="post_created_id_idx"),
+            # Author-scoped lists: SQLite appends the rowid (``id``), so
+            # this also serves the (created_at, id) keyset order.
+            models.Index(fields=["author", "created_at"],
+                        name="post_author_created_idx"),
+            # Validator aggregates and the changes feed
+            models.Index(fields=["updated_at"],
+                        name="post_updated_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
+
+class PostTombstone(models.Model):
+    """Records a deleted post so sync clients can drop their copy."""
+    post_id = models.BigIntegerField()
+    author = models.ForeignKey(settings.AUTH_USER_MODEL,
+                        on_delete=models.CASCADE)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Post {self.post_id} deleted at {self.deleted_at}"
+
+    @classmethod
+    def record(cls, posts):
+        return cls.objects.bulk_create(
+            cls(post_id=post.pk, author_id=post.author_id)
+            for post in posts
+        )
@@ -11,7 +11,30 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        return request.user.is_superuser or obj.author == request.user
+        # Ids, so a post loaded without its author never fetches it
+        return request.user.is_superuser or obj.author_id == request.user.pk
+
+    def filter_queryset(self, request, view, queryset):
+        """The rows ``request`` may act on, as a SQL predicate.
+
+        Reads are unrestricted here; writes are limited to the user's own
+        posts unless they are a superuser.
+        """
+        if (request.method in permissions.SAFE_METHODS
+                or request.user.is_superuser):
+            return queryset
+        return queryset.filter(author_id=request.user.pk)
+
+    async def ahas_permission(self, request, view):
+        return self.has_permission(request, view)
+
+    async def ahas_object_permission(self, request, view, obj):
+        # Compares ids so the author row is never lazy-loaded, which
+        # would be a sync query inside the event loop.
+        if request.method in permissions.SAFE_METHODS:
+            return True
+
+        return request.user.is_superuser or obj.author_id == request.user.pk
 
 
 
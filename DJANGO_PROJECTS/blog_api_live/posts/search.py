@@ -0,0 +1,108 @@
+"""Ranked full-text search over posts backed by the SQLite FTS5 index.
+
+``posts_post_fts`` is an external-content index over
+``posts_post(title, body)``. Triggers keep it in sync, so
+``bulk_create``, ``bulk_update`` and ``QuerySet.delete()`` are covered
+too. It is installed by migration ``0003_post_search_index``. Django
+rebuilds SQLite tables for some schema changes, which drops the
+triggers; run ``manage.py rebuild_search_index`` after such a migration.
+"""
+import html
+import re
+
+from django.db import connection
+
+CREATE_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5(
+        title, body, content='posts_post', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, title, body)
+        VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_ad
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_au
+    AFTER UPDATE OF title, body ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO posts_post_fts(rowid, title, body)
+        VALUES (new.id, new.title, new.body);
+    END""",
+    "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS posts_post_fts_au",
+    "DROP TRIGGER IF EXISTS posts_post_fts_ad",
+    "DROP TRIGGER IF EXISTS posts_post_fts_ai",
+    "DROP TABLE IF EXISTS posts_post_fts",
+]
+
+# FTS5 wraps matches in these control characters, which cannot survive
+# html.escape(); they become <mark> tags only after the text is escaped.
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+# bm25() column weights: a title hit counts ten times a body hit
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+
+def match_expression(text):
+    """Turn user input into a safe FTS5 MATCH expression.
+
+    Every word is quoted so FTS5 operators in the input are treated as
+    plain text, and the last word is a prefix match for search-as-you-type.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    terms = ['"%s"' % word for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_post_ids(text, author=None, limit=20):
+    """Return ``[(post_id, rank, snippet), ...]`` best match first.
+
+    ``snippet`` is HTML: the post text escaped, matches in ``<mark>``.
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    sql = [
+        "SELECT posts_post_fts.rowid,",
+        "       bm25(posts_post_fts, %s, %s) AS rank,",
+        "       snippet(posts_post_fts, -1, %s, %s, '…', 12)",
+        "FROM posts_post_fts",
+    ]
+    params = [TITLE_WEIGHT, BODY_WEIGHT, SNIPPET_START, SNIPPET_END]
+    if author is not None:
+        sql.append("JOIN posts_post ON posts_post.id = posts_post_fts.rowid")
+    sql.append("WHERE posts_post_fts MATCH %s")
+    params.append(expression)
+    if author is not None:
+        sql.append("AND posts_post.author_id = %s")
+        params.append(author.pk)
+    sql.append("ORDER BY rank LIMIT %s")
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute("\n".join(sql), params)
+        return [(pk, rank, snippet_html(snippet))
+                for pk, rank, snippet in cursor.fetchall()]
+
+
+def snippet_html(snippet):
+    return (html.escape(snippet).replace(SNIPPET_START, "<mark>")
+            .replace(SNIPPET_END, "</mark>"))
+
+
+def rebuild_index():
+    """(Re)create the index and triggers if missing and repopulate it."""
+    with connection.cursor() as cursor:
+        for statement in CREATE_SQL:
+            cursor.execute(statement)
@@ -1,9 +1,156 @@
-from rest_framework import serializers
+from django.contrib.auth import get_user_model
+from rest_framework import ISO_8601, permissions, serializers
+from rest_framework.settings import api_settings
 from .models import Post
 
+class AuthorSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        fields = ("id", "username", "name",)
+        model = get_user_model()
+
 class PostSerializer(serializers.ModelSerializer):
+    author_detail = AuthorSummarySerializer(source="author",
+                                            read_only=True)
+
     class Meta:
-        fields = ("id", "author", "title", "body", 
+        fields = ("id", "author", "author_detail", "title", "body", 
                     "created_at",) 
         read_only_fields = ('author', )
-        model = Post
\ No newline at end of file
+        model = Post
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        for name in set(self.fields) - output_fields(request):
+            self.fields.pop(name)
+
+
+def expands_author(request):
+    expand = request.query_params.get("expand", "")
+    return "author" in expand.split(",")
+
+
+def _field_names(request, param):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = names - set(PostSerializer.Meta.fields)
+    if unknown:
+        raise serializers.ValidationError(
+            {param: [f"Unknown field(s): {', '.join(sorted(unknown))}."]})
+    return names
+
+
+def output_fields(request):
+    """Names of the ``PostSerializer`` fields to render for ``request``.
+
+    ``author_detail`` is opt-in via ``?expand=author``. On reads the
+    client may narrow the rest with ``?fields=`` and/or ``?omit=``;
+    unknown names are a validation error.
+    """
+    fields = set(PostSerializer.Meta.fields)
+    if request is None or not hasattr(request, "query_params"):
+        return fields - {"author_detail"}
+    if not expands_author(request):
+        fields.discard("author_detail")
+    if request.method in permissions.SAFE_METHODS:
+        fields &= _field_names(request, "fields") or fields
+        fields -= _field_names(request, "omit") or set()
+    return fields
+
+
+DEFERRABLE_FIELDS = ("title", "body", "author")
+
+
+def project_queryset(queryset, request):
+    """Defer the columns of fields ``request`` will not render.
+
+    Only reads are projected. ``created_at`` and ``updated_at`` are
+    always loaded because the paginator and the ETag validators need
+    them.
+    """
+    if request.method not in permissions.SAFE_METHODS:
+        return queryset
+    selected = output_fields(request)
+    if "author_detail" in selected:
+        selected.add("author")
+    else:
+        queryset = queryset.select_related(None)
+    deferred = [name for name in DEFERRABLE_FIELDS if name not in selected]
+    return queryset.defer(*deferred) if deferred else queryset
+
+
+class PostValuesSerializer:
+    """Read-only ``PostSerializer`` output built from ``.values()`` rows.
+
+    Renders the same dicts (same keys, order and values) without
+    instantiating a model or walking DRF's field machinery for each row.
+    The field list and converters are worked out once per request; a
+    column whose database value is already its JSON value is copied as
+    is.
+    """
+    # The paginator and the ETag validators need these on every row
+    always_selected = ("id", "created_at", "updated_at")
+
+    def __init__(self, request):
+        fields = PostSerializer(context={"request": request}).fields
+        self.converters = []
+        columns = set(self.always_selected)
+        for name, field in fields.items():
+            if name == "author_detail":
+                columns.update(("author_id", "author__username",
+                                "author__name"))
+                self.converters.append((name, None, author_summary))
+                continue
+            column = "author_id" if name == "author" else name
+            columns.add(column)
+            self.converters.append((name, column, converter(field)))
+        self.columns = sorted(columns)
+
+    def values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def to_representation(self, row):
+        data = {}
+        for name, column, convert in self.converters:
+            if column is None:
+                data[name] = convert(row)
+                continue
+            value = row[column]
+            data[name] = (value if convert is None or value is None
+                          else convert(value))
+        return data
+
+
+PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField,
+                      serializers.PrimaryKeyRelatedField)
+
+
+def converter(field):
+    """A ``value -> JSON value`` function equivalent to ``field``.
+
+    ``None`` means the database value is used as is. ISO 8601 datetimes
+    resolve the output timezone once instead of per value, which is
+    where ``DateTimeField.to_representation`` spends most of its time.
+    """
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        return None
+    if isinstance(field, serializers.DateTimeField):
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        tz = (field.timezone if hasattr(field, "timezone")
+              else field.default_timezone())
+        if (isinstance(output_format, str)
+                and output_format.lower() == ISO_8601 and tz is not None):
+            def iso_datetime(value):
+                value = value.astimezone(tz).isoformat()
+                if value.endswith("+00:00"):
+                    value = value[:-6] + "Z"
+                return value
+            return iso_datetime
+    return field.to_representation
+
+
+def author_summary(row):
+    return {"id": row["author_id"], "username": row["author__username"],
+            "name": row["author__name"]}
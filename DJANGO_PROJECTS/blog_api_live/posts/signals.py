@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, coalescing
+from .models import Post
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_cached_post_lists(sender, instance, **kwargs):
+    caching.invalidate_authors([instance.author_id])
+    coalescing.flights.forget()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_author_lists(sender, instance, **kwargs):
+    # ``?expand=author`` renders the author's name into the list
+    caching.invalidate_authors([instance.pk])
+
@@ -1,11 +1,60 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from accounts.tokens import issue_tokens
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Post
+from . import caching, coalescing
+from .coalescing import SingleFlight
+from .models import Post, PostTombstone
+from .throttling import SlidingWindowStore, store_path
+from .views import PostDetail, PostList
 
 User = get_user_model()
 
+
+class QueryPlanAssertionsMixin:
+    """Fail when a query the view runs falls back to a full table scan."""
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullTableScan(self, func, table='posts_post', allow=()):
+        """Fail on any ``SCAN`` of ``table``, covering indexes included.
+
+        The one scan that passes is an index walk cut short by ``LIMIT``.
+        Queries containing a string in ``allow`` are intentional full
+        scans and are skipped.
+        """
+        with CaptureQueriesContext(connection) as context:
+            func()
+        queries = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('SELECT')
+                   and f'"{table}"' in query['sql']]
+        self.assertTrue(queries, f'No query on {table} was captured.')
+        for sql in queries:
+            if any(allowed in sql for allowed in allow):
+                continue
+            plan = self.query_plan(sql)
+            bounded = ' LIMIT ' in sql
+            scans = [step for step in plan
+                     if step.split()[:2] == ['SCAN', table]
+                     and not (bounded and ' USING INDEX ' in step)]
+            self.assertFalse(scans, f'Full table scan:\n{sql}\n{plan}')
+
 class BlogTest(APITestCase):
     @classmethod
     def setUpTestData(cls):
@@ -197,3 +246,1288 @@ class PostAPITestCase(APITestCase):
         self.assertFalse(
             Post.objects.filter(pk=self.post.pk).exists()
             )
+
+
+class PostPaginationTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+                                        username='admin',
+                                    password='adminpassword'
+        )
+        cls.posts = [
+            Post.objects.create(title=f'Post {i}',
+                                author=cls.admin_user,
+                                body='Body')
+            for i in range(5)
+        ]
+        cls.post_list_url = reverse('post_list')
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.admin_user)
+
+    def test_list_without_page_params_is_unpaginated(self):
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+
+    def test_cursor_walks_all_posts_newest_first(self):
+        ids = []
+        url = self.post_list_url + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            ids.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids,
+                         [post.id for post in reversed(self.posts)])
+
+    def test_cursor_breaks_created_at_ties_by_id(self):
+        Post.objects.update(created_at=self.posts[0].created_at)
+        first = self.client.get(self.post_list_url + '?page_size=3')
+        second = self.client.get(first.data['next'])
+        ids = [post['id'] for post in first.data['results']]
+        ids += [post['id'] for post in second.data['results']]
+        self.assertEqual(ids,
+                         [post.id for post in reversed(self.posts)])
+        self.assertIsNone(second.data['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.post_list_url + '?cursor=nope')
+        self.assertEqual(response.status_code,
+                        status.HTTP_404_NOT_FOUND)
+
+
+class PostAuthorSummaryTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+                                        username='admin',
+                                    password='adminpassword'
+        )
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}',
+                                     password='password',
+                                     name=f'Author {i}')
+            for i in range(4)
+        ]
+        for author in cls.authors:
+            Post.objects.create(title='Title', author=author,
+                                body='Body')
+        cls.post_list_url = reverse('post_list')
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client.force_authenticate(user=self.admin_user)
+
+    def test_author_summary_is_opt_in(self):
+        response = self.client.get(self.post_list_url)
+        self.assertNotIn('author_detail', response.data[0])
+
+    def test_author_summary_embedded(self):
+        response = self.client.get(self.post_list_url + '?expand=author')
+        post = response.data[0]
+        author = User.objects.get(pk=post['author'])
+        self.assertEqual(post['author_detail'], {
+            'id': author.id,
+            'username': author.username,
+            'name': author.name,
+        })
+
+    def test_list_query_count_independent_of_authors(self):
+        # validator aggregate + ETag author digest + page
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                self.post_list_url + '?expand=author')
+        self.assertEqual(len(response.data), 4)
+
+    def test_paginated_query_count(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                self.post_list_url + '?expand=author&page_size=3')
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_detail_query_count(self):
+        post = Post.objects.first()
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('post_detail', kwargs={'pk': post.pk})
+                + '?expand=author')
+        self.assertEqual(response.data['author_detail']['id'],
+                         post.author_id)
+
+
+class PostConditionalGetTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.post = Post.objects.create(title='Sample Post',
+                                       author=cls.user,
+                                       body='Sample Body')
+        cls.post_list_url = reverse('post_list')
+        cls.post_detail_url = reverse('post_detail',
+                                kwargs={'pk': cls.post.pk})
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def test_detail_etag_not_modified(self):
+        response = self.client.get(self.post_detail_url)
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(self.post_detail_url,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code,
+                        status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_etag_changes_on_update(self):
+        etag = self.client.get(self.post_detail_url)['ETag']
+        self.client.patch(self.post_detail_url, {'title': 'Changed'})
+        response = self.client.get(self.post_detail_url,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_if_modified_since(self):
+        last_modified = self.client.get(
+            self.post_detail_url)['Last-Modified']
+        response = self.client.get(self.post_detail_url,
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code,
+                        status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_not_modified_skips_page_query(self):
+        etag = self.client.get(self.post_list_url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.post_list_url,
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code,
+                        status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes_on_create_and_delete(self):
+        etag = self.client.get(self.post_list_url)['ETag']
+        new_post = Post.objects.create(title='Another', author=self.user,
+                                       body='Body')
+        after_create = self.client.get(self.post_list_url,
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after_create.status_code, status.HTTP_200_OK)
+        new_post.delete()
+        after_delete = self.client.get(
+            self.post_list_url,
+            HTTP_IF_NONE_MATCH=after_create['ETag'])
+        self.assertEqual(after_delete.status_code, status.HTTP_200_OK)
+
+    def test_expanded_etags_change_when_author_renamed(self):
+        detail_url = self.post_detail_url + '?expand=author'
+        list_url = self.post_list_url + '?expand=author'
+        detail_etag = self.client.get(detail_url)['ETag']
+        list_etag = self.client.get(list_url)['ETag']
+        self.user.name = 'Renamed'
+        self.user.save()
+        coalescing.flights.forget()
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['author_detail']['name'], 'Renamed')
+        response = self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_has_no_last_modified(self):
+        older = Post.objects.create(title='Older', author=self.user,
+                                    body='Body')
+        Post.objects.filter(pk=older.pk).update(updated_at=self.post.updated_at
+                                                .replace(year=2000))
+        response = self.client.get(self.post_list_url)
+        self.assertNotIn('Last-Modified', response)
+        older.delete()
+        # If-Modified-Since alone can no longer be answered with 304
+        response = self.client.get(
+            self.post_list_url,
+            HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)), 1)
+
+    def test_list_etag_varies_with_query_string(self):
+        plain = self.client.get(self.post_list_url)['ETag']
+        paged = self.client.get(self.post_list_url + '?page_size=1')
+        self.assertNotEqual(plain, paged['ETag'])
+
+
+class PostBulkTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.other_user = User.objects.create_user(username='other',
+                                    password='otherpassword')
+        cls.post = Post.objects.create(title='Mine', author=cls.user,
+                                       body='Body')
+        cls.other_post = Post.objects.create(title='Theirs',
+                                             author=cls.other_user,
+                                             body='Body')
+        cls.bulk_url = reverse('post_bulk')
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create(self):
+        items = [{'title': f'Bulk {i}', 'body': 'Body'} for i in range(3)]
+        with self.assertNumQueries(3):  # savepoint + insert + release
+            response = self.client.post(self.bulk_url, items,
+                                        format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = [result['data'] for result in response.data['results']]
+        self.assertEqual([post['title'] for post in created],
+                         ['Bulk 0', 'Bulk 1', 'Bulk 2'])
+        self.assertEqual(
+            Post.objects.filter(author=self.user).count(), 4)
+
+    def test_bulk_create_reports_item_errors(self):
+        items = [{'title': 'Good', 'body': 'Body'}, {'title': 'Bad'}]
+        response = self.client.post(self.bulk_url, items, format='json')
+        self.assertEqual(response.status_code,
+                        status.HTTP_207_MULTI_STATUS)
+        good, bad = response.data['results']
+        self.assertEqual(good['status'], status.HTTP_201_CREATED)
+        self.assertEqual(bad['status'], status.HTTP_400_BAD_REQUEST)
+        self.assertIn('body', bad['errors'])
+        self.assertTrue(Post.objects.filter(title='Good').exists())
+
+    def test_bulk_create_atomic_aborts(self):
+        items = [{'title': 'Good', 'body': 'Body'}, {'title': 'Bad'}]
+        response = self.client.post(self.bulk_url + '?atomic=true',
+                                    items, format='json')
+        self.assertEqual(response.status_code,
+                        status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Post.objects.filter(title='Good').exists())
+
+    def test_bulk_update_enforces_author(self):
+        items = [
+            {'id': self.post.pk, 'title': 'Updated'},
+            {'id': self.other_post.pk, 'title': 'Hijacked'},
+            {'id': 0, 'title': 'Missing'},
+        ]
+        response = self.client.patch(self.bulk_url, items, format='json')
+        self.assertEqual(response.status_code,
+                        status.HTTP_207_MULTI_STATUS)
+        codes = [result['status'] for result in response.data['results']]
+        self.assertEqual(codes, [status.HTTP_200_OK,
+                                 status.HTTP_403_FORBIDDEN,
+                                 status.HTTP_404_NOT_FOUND])
+        self.post.refresh_from_db()
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.post.title, 'Updated')
+        self.assertEqual(self.other_post.title, 'Theirs')
+
+    def test_bulk_put_requires_all_fields(self):
+        response = self.client.put(self.bulk_url,
+                                   [{'id': self.post.pk, 'title': 'x'}],
+                                   format='json')
+        self.assertEqual(response.data['results'][0]['status'],
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_delete(self):
+        response = self.client.delete(
+            self.bulk_url, [self.post.pk, self.other_post.pk],
+            format='json')
+        self.assertEqual(response.status_code,
+                        status.HTTP_207_MULTI_STATUS)
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(
+            Post.objects.filter(pk=self.other_post.pk).exists())
+
+    def test_bulk_requires_list(self):
+        response = self.client.post(self.bulk_url,
+                                    {'title': 'x', 'body': 'y'},
+                                    format='json')
+        self.assertEqual(response.status_code,
+                        status.HTTP_400_BAD_REQUEST)
+
+
+class PostExportTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.admin_user = User.objects.create_superuser(
+                                        username='admin',
+                                    password='adminpassword'
+        )
+        for i in range(3):
+            Post.objects.create(title=f'User {i}', author=cls.user,
+                                body='Body')
+        Post.objects.create(title='Admin', author=cls.admin_user,
+                            body='Body')
+        cls.export_url = reverse('post_export')
+
+    def export(self, user):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_export_as_admin(self):
+        rows = self.export(self.admin_user)
+        self.assertEqual([row['id'] for row in rows],
+                         list(Post.objects.order_by('id')
+                              .values_list('id', flat=True)))
+        self.assertEqual(set(rows[0]),
+                         {'id', 'author', 'title', 'body', 'created_at'})
+
+    def test_export_as_author(self):
+        rows = self.export(self.user)
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(all(row['author'] == self.user.pk for row in rows))
+
+    def test_export_unauthenticated(self):
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code,
+                        status.HTTP_403_FORBIDDEN)
+
+
+class PostSparseFieldsTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.post = Post.objects.create(title='Sample Post',
+                                       author=cls.user,
+                                       body='Sample Body')
+        cls.post_list_url = reverse('post_list')
+        cls.post_detail_url = reverse('post_detail',
+                                kwargs={'pk': cls.post.pk})
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def get_with_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, queries[-1]['sql']
+
+    def test_fields_shapes_list_and_projection(self):
+        response, sql = self.get_with_queries(
+            self.post_list_url + '?fields=id,title,created_at')
+        self.assertEqual(set(response.data[0]),
+                         {'id', 'title', 'created_at'})
+        self.assertNotIn('"body"', sql)
+
+    def test_omit_shapes_detail_and_projection(self):
+        response, sql = self.get_with_queries(
+            self.post_detail_url + '?omit=body')
+        self.assertNotIn('body', response.data)
+        self.assertIn('title', response.data)
+        self.assertNotIn('"body"', sql)
+
+    def test_expand_keeps_author_join(self):
+        response, sql = self.get_with_queries(
+            self.post_detail_url + '?fields=id,author_detail&expand=author')
+        self.assertEqual(set(response.data), {'id', 'author_detail'})
+        self.assertIn('JOIN', sql)
+
+    def test_unknown_field_rejected(self):
+        response = self.client.get(self.post_list_url + '?fields=id,secret')
+        self.assertEqual(response.status_code,
+                        status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+
+    def test_fields_ignored_on_write(self):
+        response = self.client.post(self.post_list_url + '?fields=id',
+            {'title': 'new post', 'body': 'new content'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['body'], 'new content')
+
+
+class PostSearchTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.other_user = User.objects.create_user(username='other',
+                                    password='otherpassword')
+        cls.title_hit = Post.objects.create(
+            title='Django performance', author=cls.user,
+            body='Notes about caching.')
+        cls.body_hit = Post.objects.create(
+            title='Misc', author=cls.user,
+            body='A long text that mentions performance once.')
+        Post.objects.create(title='Unrelated', author=cls.user,
+                            body='Nothing to see here.')
+        Post.objects.create(title='Performance elsewhere',
+                            author=cls.other_user, body='Body')
+        cls.search_url = reverse('post_search')
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def search(self, query):
+        response = self.client.get(self.search_url, {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_ranked_and_scoped_results(self):
+        results = self.search('performance')
+        self.assertEqual([post['id'] for post in results],
+                         [self.title_hit.pk, self.body_hit.pk])
+        self.assertIn('<mark>performance</mark>', results[1]['snippet'])
+
+    def test_prefix_match(self):
+        self.assertEqual(len(self.search('perf')), 2)
+
+    def test_snippet_escapes_post_text(self):
+        Post.objects.create(title='Evil', author=self.user,
+                            body='<img src=x onerror=alert(1)> zebra & co')
+        (result,) = self.search('zebra')
+        self.assertEqual(result['snippet'],
+                         '&lt;img src=x onerror=alert(1)&gt; '
+                         '<mark>zebra</mark> &amp; co')
+
+    def test_operators_are_plain_text(self):
+        self.assertEqual(self.search('"NEAR( OR'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.body_hit.body = 'Rewritten without the keyword.'
+        self.body_hit.save()
+        self.assertEqual([post['id'] for post in
+                          self.search('performance')],
+                         [self.title_hit.pk])
+        self.title_hit.delete()
+        self.assertEqual(self.search('performance'), [])
+
+    def test_index_follows_bulk_create(self):
+        Post.objects.bulk_create([
+            Post(title='Bulk', author=self.user, body='zebra')])
+        self.assertEqual(len(self.search('zebra')), 1)
+
+    def test_superuser_searches_everything(self):
+        admin = User.objects.create_superuser(username='admin',
+                                              password='adminpassword')
+        self.client.force_authenticate(user=admin)
+        self.assertEqual(len(self.search('performance')), 3)
+
+
+class PostChangesTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.other_user = User.objects.create_user(username='other',
+                                    password='otherpassword')
+        cls.kept = Post.objects.create(title='Kept', author=cls.user,
+                                       body='Body')
+        cls.edited = Post.objects.create(title='Edited', author=cls.user,
+                                         body='Body')
+        cls.removed = Post.objects.create(title='Removed',
+                                          author=cls.user, body='Body')
+        cls.theirs = Post.objects.create(title='Theirs',
+                                         author=cls.other_user,
+                                         body='Body')
+        cls.changes_url = reverse('post_changes')
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def sync(self, since=None):
+        params = {'since': since} if since else {}
+        response = self.client.get(self.changes_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_initial_sync_returns_own_posts(self):
+        data = self.sync()
+        self.assertEqual([post['id'] for post in data['changed']],
+                         [self.kept.pk, self.edited.pk, self.removed.pk])
+        self.assertEqual(data['deleted'], [])
+        self.assertIsNotNone(data['cursor'])
+
+    def test_delta_returns_only_changes_and_tombstones(self):
+        cursor = self.sync()['cursor']
+        self.client.patch(reverse('post_detail',
+                                  kwargs={'pk': self.edited.pk}),
+                          {'title': 'Edited again'})
+        self.client.delete(reverse('post_detail',
+                                   kwargs={'pk': self.removed.pk}))
+        self.client.force_authenticate(user=self.other_user)
+        self.client.delete(reverse('post_detail',
+                                   kwargs={'pk': self.theirs.pk}))
+        self.client.force_authenticate(user=self.user)
+
+        data = self.sync(cursor)
+        self.assertEqual([post['id'] for post in data['changed']],
+                         [self.edited.pk])
+        self.assertEqual(data['deleted'], [self.removed.pk])
+        self.assertGreater(data['cursor'], cursor)
+
+        data = self.sync(data['cursor'])
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(data['deleted'], [])
+
+    def test_bulk_delete_records_tombstones(self):
+        cursor = self.sync()['cursor']
+        self.client.delete(reverse('post_bulk'), [self.kept.pk],
+                           format='json')
+        self.assertEqual(self.sync(cursor)['deleted'], [self.kept.pk])
+
+    def test_invalid_since(self):
+        response = self.client.get(self.changes_url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code,
+                        status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncPostViewsTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.other_user = User.objects.create_user(username='other',
+                                    password='otherpassword')
+        cls.post = Post.objects.create(title='Sample Post',
+                                       author=cls.user,
+                                       body='Sample Body')
+        cls.other_post = Post.objects.create(title='Theirs',
+                                             author=cls.other_user,
+                                             body='Body')
+        cls.list_url = reverse('async_post_list')
+        cls.detail_url = reverse('async_post_detail',
+                                 kwargs={'pk': cls.post.pk})
+        cls.other_detail_url = reverse('async_post_detail',
+                                       kwargs={'pk': cls.other_post.pk})
+
+    def setUp(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_unauthenticated(self):
+        self.client.credentials()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code,
+                        status.HTTP_403_FORBIDDEN)
+
+    def test_list_matches_sync_view(self):
+        response = self.client.get(self.list_url + '?expand=author')
+        sync_response = self.client.get(
+            reverse('post_list') + '?expand=author')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), sync_response.json())
+
+    def test_paginated_list(self):
+        Post.objects.create(title='Second', author=self.user, body='Body')
+        response = self.client.get(self.list_url + '?page_size=1')
+        page = response.json()
+        self.assertEqual(len(page['results']), 1)
+        self.assertEqual(len(self.client.get(page['next'])
+                             .json()['results']), 1)
+
+    def test_signed_token_authentication(self):
+        access = issue_tokens(self.user)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(self.list_url,
+            {'title': 'signed', 'body': 'content'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}x')
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_session_authentication(self):
+        self.client.credentials()
+        self.client.login(username='user', password='userpassword')
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['title'], 'Sample Post')
+
+    def test_create(self):
+        response = self.client.post(self.list_url,
+            {'title': 'new post', 'body': 'new content'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Post.objects.latest('id').author, self.user)
+
+    def test_create_invalid(self):
+        response = self.client.post(self.list_url, {'title': 'x'},
+                                    format='json')
+        self.assertEqual(response.status_code,
+                        status.HTTP_400_BAD_REQUEST)
+        self.assertIn('body', response.json())
+
+    def test_invalid_fields_match_sync_view(self):
+        response = self.client.get(self.list_url + '?fields=bogus')
+        sync_response = self.client.get(reverse('post_list') + '?fields=bogus')
+        self.assertEqual(response.status_code,
+                        status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertIn('fields', response.json())
+
+    def test_list_not_modified(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['ETag'],
+                         self.client.get(reverse('post_list'))['ETag'])
+        response = self.client.get(self.list_url,
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code,
+                        status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_not_modified(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        response = self.client.get(self.detail_url,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code,
+                        status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_as_author(self):
+        response = self.client.patch(self.detail_url,
+                                     {'title': 'Updated'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'Updated')
+
+    def test_update_as_not_author(self):
+        response = self.client.put(self.other_detail_url,
+                                   {'title': 'x', 'body': 'y'},
+                                   format='json')
+        self.assertEqual(response.status_code,
+                        status.HTTP_403_FORBIDDEN)
+
+    def test_delete_records_tombstone(self):
+        response = self.client.delete(self.detail_url)
+        self.assertEqual(response.status_code,
+                        status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(PostTombstone.objects.filter(
+            post_id=self.post.pk).exists())
+
+    def test_missing(self):
+        response = self.client.get(reverse('async_post_detail',
+                                           kwargs={'pk': 0}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PostListCacheTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword',
+                                    name='Old Name')
+        cls.other_user = User.objects.create_user(username='other',
+                                    password='otherpassword')
+        cls.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword')
+        cls.post = Post.objects.create(title='Sample Post',
+                                       author=cls.user,
+                                       body='Sample Body')
+        cls.post_list_url = reverse('post_list')
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client.force_authenticate(user=self.user)
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.client.get(self.post_list_url)
+        # validator aggregate only
+        with self.assertNumQueries(1):
+            second = self.client.get(self.post_list_url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(caching.stats(),
+                         {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_hit_and_miss_return_the_same_response_type(self):
+        first = self.client.get(self.post_list_url)
+        second = self.client.get(self.post_list_url)
+        self.assertIs(type(second), type(first))
+        self.assertEqual(second.data, first.data)
+
+    def test_create_invalidates(self):
+        self.client.get(self.post_list_url)
+        self.client.post(self.post_list_url,
+                         {'title': 'New', 'body': 'Body'}, format='json')
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+    def test_bulk_update_invalidates(self):
+        self.client.get(self.post_list_url)
+        self.client.patch(reverse('post_bulk'),
+                          [{'id': self.post.pk, 'title': 'Bulk'}],
+                          format='json')
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(json.loads(response.content)[0]['title'], 'Bulk')
+
+    def test_author_change_invalidates_expanded_list(self):
+        url = self.post_list_url + '?expand=author'
+        self.client.get(url)
+        self.user.name = 'New Name'
+        self.user.save()
+        response = self.client.get(url)
+        data = json.loads(response.content)
+        self.assertEqual(data[0]['author_detail']['name'], 'New Name')
+
+    def test_other_author_write_keeps_entry(self):
+        self.client.get(self.post_list_url)
+        Post.objects.create(title='Other', author=self.other_user,
+                            body='Body')
+        with self.assertNumQueries(1):
+            self.client.get(self.post_list_url)
+        self.assertEqual(caching.stats()['hits'], 1)
+
+    def test_scopes_are_separate(self):
+        Post.objects.create(title='Other', author=self.other_user,
+                            body='Body')
+        self.client.get(self.post_list_url)
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(self.post_list_url)
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+    def test_stats_endpoint_is_admin_only(self):
+        url = reverse('post_list_cache_stats')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(url)
+        self.assertEqual(response.data['hits'], 0)
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code,
+                         status.HTTP_204_NO_CONTENT)
+
+
+class PostWriteAuthorizationTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.other_user = User.objects.create_user(username='other',
+                                    password='otherpassword')
+        cls.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword')
+        cls.post = Post.objects.create(title='Sample Post',
+                                       author=cls.user,
+                                       body='Sample Body')
+        cls.post_detail_url = reverse('post_detail',
+                                kwargs={'pk': cls.post.pk})
+
+    def test_non_author_write_never_loads_the_row(self):
+        self.client.force_authenticate(user=self.other_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.post_detail_url,
+                                         {'title': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        # scoped lookup (no match) + exists() probe
+        self.assertEqual(len(queries), 2)
+        self.assertIn('author_id', queries[0]['sql'])
+        self.assertNotIn('"body"', queries[1]['sql'])
+
+    def test_non_author_delete_is_forbidden(self):
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.delete(self.post_detail_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_missing_post_is_not_found(self):
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.put(
+            reverse('post_detail', kwargs={'pk': 0}),
+            {'title': 'x', 'body': 'y'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_author_can_write(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.patch(self.post_detail_url,
+                                     {'title': 'Updated'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Updated')
+        self.assertEqual(response.data['body'], 'Sample Body')
+
+    def test_author_delete_never_loads_the_author(self):
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(self.post_detail_url)
+        self.assertEqual(response.status_code,
+                         status.HTTP_204_NO_CONTENT)
+        user_table = User._meta.db_table
+        self.assertFalse([query for query in queries
+                          if f'FROM "{user_table}"' in query['sql']])
+
+    def test_superuser_can_delete(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.delete(self.post_detail_url)
+        self.assertEqual(response.status_code,
+                         status.HTTP_204_NO_CONTENT)
+        self.assertTrue(PostTombstone.objects.filter(
+            post_id=self.post.pk, author=self.user).exists())
+
+
+class PostQueryPlanTestCase(QueryPlanAssertionsMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword')
+        cls.posts = [Post.objects.create(title=f'Post {i}', body='Body',
+                                         author=cls.user)
+                     for i in range(5)]
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, url):
+        return lambda: self.assertEqual(self.client.get(url).status_code,
+                                        status.HTTP_200_OK)
+
+    def test_author_list(self):
+        self.assertNoFullTableScan(self.get(reverse('post_list')))
+
+    def test_author_list_pages(self):
+        url = reverse('post_list') + '?page_size=2'
+        self.assertNoFullTableScan(self.get(url))
+        next_url = json.loads(self.client.get(url).content)['next']
+        self.assertNoFullTableScan(self.get(next_url))
+
+    def test_superuser_list_page(self):
+        # The unpaged superuser list reads every row by design, and so
+        # does the ETag aggregate behind every superuser list
+        self.client.force_authenticate(user=self.admin_user)
+        self.assertNoFullTableScan(
+            self.get(reverse('post_list') + '?page_size=2'),
+            allow=['MAX("posts_post"."updated_at")'])
+
+    def test_detail(self):
+        url = reverse('post_detail', kwargs={'pk': self.posts[0].pk})
+        self.assertNoFullTableScan(self.get(url))
+
+    def test_changes(self):
+        url = reverse('post_changes') + '?since=2020-01-01T00:00:00Z'
+        self.assertNoFullTableScan(self.get(url))
+        self.assertNoFullTableScan(self.get(url),
+                                   table='posts_posttombstone')
+        self.client.force_authenticate(user=self.admin_user)
+        self.assertNoFullTableScan(self.get(url))
+
+    def test_detects_full_table_scan(self):
+        with self.assertRaises(AssertionError):
+            self.assertNoFullTableScan(
+                lambda: list(Post.objects.filter(body='Body')))
+
+    def test_detects_covering_index_scan(self):
+        with self.assertRaises(AssertionError):
+            self.assertNoFullTableScan(
+                lambda: Post.objects.aggregate(Count('id')))
+
+
+class PostValuesSerializerTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword',
+                                    name='Zoë "Q" Writer')
+        cls.nameless = User.objects.create_user(username='nameless',
+                                    password='password')
+        cls.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword')
+        for i in range(7):
+            Post.objects.create(title=f'Title {i} ✓', body=f'Body\n{i}',
+                                author=cls.user if i % 2 else cls.nameless)
+        cls.post = Post.objects.first()
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.admin_user)
+
+    def assertSameBytes(self, url):
+        caching.get_cache().clear()
+        fast = self.client.get(url)
+        caching.get_cache().clear()
+        with patch.object(PostList, 'use_values_serializer', False), \
+                patch.object(PostDetail, 'use_values_serializer', False):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content, url)
+        self.assertEqual(fast['ETag'], slow['ETag'])
+
+    def test_list_output_is_identical(self):
+        for query in ('', '?expand=author', '?fields=id,created_at',
+                      '?omit=body&expand=author', '?fields=author',
+                      '?page_size=3', '?page_size=3&expand=author'):
+            self.assertSameBytes(reverse('post_list') + query)
+
+    def test_next_page_is_identical(self):
+        url = reverse('post_list') + '?page_size=3'
+        next_url = json.loads(self.client.get(url).content)['next']
+        self.assertSameBytes(next_url)
+
+    def test_detail_output_is_identical(self):
+        url = reverse('post_detail', kwargs={'pk': self.post.pk})
+        for query in ('', '?expand=author', '?fields=title,author'):
+            self.assertSameBytes(url + query)
+
+    def test_author_scoped_list_is_identical(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertSameBytes(reverse('post_list') + '?expand=author')
+
+    def test_detail_reads_one_row_without_model(self):
+        url = reverse('post_detail', kwargs={'pk': self.post.pk})
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data['id'], self.post.pk)
+
+
+class SlidingWindowStoreTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'throttle.sqlite3')
+        self.store = SlidingWindowStore(self.path)
+
+    def test_test_run_uses_a_throwaway_store(self):
+        # Set by django_project.test_runner; the host's store is untouched
+        self.assertNotEqual(store_path(), os.path.join(
+            tempfile.gettempdir(), 'blog_api_live-throttle.sqlite3'))
+
+    def test_limit_within_window(self):
+        results = [self.store.hit('k', 3, 60, now=120 + i)
+                   for i in range(4)]
+        self.assertEqual([allowed for allowed, _ in results],
+                         [True, True, True, False])
+        self.assertEqual(results[-1][1], 57)
+
+    def test_previous_window_decays(self):
+        for _ in range(4):
+            self.store.hit('k', 4, 60, now=60)
+        # 45s into the next window the previous 4 count as 1
+        allowed = [self.store.hit('k', 4, 60, now=165)[0]
+                   for _ in range(4)]
+        self.assertEqual(allowed, [True, True, True, False])
+
+    def test_counters_are_shared_between_connections(self):
+        # A second store stands in for another worker process
+        other = SlidingWindowStore(self.path)
+        self.store.hit('k', 2, 60, now=0)
+        other.hit('k', 2, 60, now=1)
+        self.assertFalse(self.store.hit('k', 2, 60, now=2)[0])
+
+    def test_keys_are_independent(self):
+        self.store.hit('a', 1, 60, now=0)
+        self.assertTrue(self.store.hit('b', 1, 60, now=0)[0])
+
+
+class PostThrottleTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.other_user = User.objects.create_user(username='other',
+                                    password='otherpassword')
+        cls.post_list_url = reverse('post_list')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'throttle.sqlite3')
+        store_path = override_settings(THROTTLE_STORE_PATH=path)
+        store_path.enable()
+        self.addCleanup(store_path.disable)
+
+    def rates(self, user, ip):
+        return override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'posts_user': user, 'posts_ip': ip},
+        })
+
+    def get_statuses(self, user, count, url=None):
+        self.client.force_authenticate(user=user)
+        return [self.client.get(url or self.post_list_url).status_code
+                for _ in range(count)]
+
+    def test_user_scope(self):
+        with self.rates('2/min', '100/min'):
+            self.assertEqual(self.get_statuses(self.user, 3),
+                             [200, 200, 429])
+            self.assertEqual(self.get_statuses(self.other_user, 1), [200])
+            self.client.force_authenticate(user=self.user)
+            response = self.client.get(self.post_list_url)
+        self.assertEqual(response.status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    def test_ip_scope_spans_users(self):
+        with self.rates('100/min', '2/min'):
+            self.assertEqual(self.get_statuses(self.user, 2), [200, 200])
+            self.assertEqual(self.get_statuses(self.other_user, 1), [429])
+
+    def test_detail_is_throttled(self):
+        post = Post.objects.create(title='Title', body='Body',
+                                   author=self.user)
+        url = reverse('post_detail', kwargs={'pk': post.pk})
+        with self.rates('1/min', '100/min'):
+            self.assertEqual(self.get_statuses(self.user, 2, url),
+                             [200, 429])
+
+    def test_async_views_share_the_counters(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        post = Post.objects.create(title='Title', body='Body',
+                                   author=self.user)
+        urls = [reverse('post_list'), reverse('async_post_list'),
+                reverse('async_post_detail', kwargs={'pk': post.pk})]
+        with self.rates('2/min', '100/min'):
+            statuses = [self.client.get(url) for url in urls]
+        self.assertEqual([response.status_code for response in statuses],
+                         [200, 200, 429])
+        self.assertIn('Retry-After', statuses[-1])
+
+    def test_async_ip_scope(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        with self.rates('100/min', '1/min'):
+            statuses = [self.client.get(reverse('async_post_list'))
+                        .status_code for _ in range(2)]
+        self.assertEqual(statuses, [200, 429])
+
+    def test_rate_none_disables_scope(self):
+        with self.rates(None, None):
+            self.assertEqual(self.get_statuses(self.user, 3),
+                             [200, 200, 200])
+
+
+class PostMultiGetTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.other_user = User.objects.create_user(username='other',
+                                    password='otherpassword')
+        cls.posts = [Post.objects.create(title=f'Post {i}', body='Body',
+                                         author=cls.user)
+                     for i in range(3)]
+        cls.other_post = Post.objects.create(title='Other', body='Body',
+                                             author=cls.other_user)
+        cls.post_list_url = reverse('post_list')
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def ids_url(self, *ids, query=''):
+        return (self.post_list_url + '?ids='
+                + ','.join(str(pk) for pk in ids) + query)
+
+    def test_request_order_and_missing(self):
+        first, second, third = self.posts
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.ids_url(third.pk, 0, first.pk, third.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post['id'] for post in response.data['results']],
+                         [third.pk, first.pk])
+        self.assertEqual(response.data['missing'], [0])
+        self.assertEqual(response.data['forbidden'], [])
+
+    def test_matches_detail_representation(self):
+        # Same visibility as PostDetail: readable whoever the author is
+        url = reverse('post_detail', kwargs={'pk': self.other_post.pk})
+        detail = self.client.get(url + '?expand=author').data
+        response = self.client.get(
+            self.ids_url(self.other_post.pk, query='&expand=author'))
+        self.assertEqual(response.data['results'], [detail])
+
+    def test_sparse_fields(self):
+        response = self.client.get(
+            self.ids_url(self.posts[0].pk, query='&fields=id,title'))
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+
+    def test_invalid_ids(self):
+        response = self.client.get(self.post_list_url + '?ids=1,x')
+        self.assertEqual(response.status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ids', response.data)
+
+    def test_too_many_ids(self):
+        response = self.client.get(self.ids_url(*range(1, 102)))
+        self.assertEqual(response.status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_etag_not_modified(self):
+        url = self.ids_url(self.posts[0].pk, self.posts[1].pk)
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        self.posts[1].title = 'Changed'
+        self.posts[1].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class SingleFlightTestCase(SimpleTestCase):
+    def run_concurrently(self, flights, func, count, key='k'):
+        results, errors = [], []
+
+        def call():
+            try:
+                results.append(flights.do(key, func))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_concurrent_calls_share_one_computation(self):
+        flights = SingleFlight()
+        release, calls = threading.Event(), []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 'value'
+
+        threads, results, _ = self.run_concurrently(flights, compute, 8)
+        # Wait until every follower is parked on the leader's call
+        while flights.stats()['collapsed'] < 7:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(flights.stats()['computed'], 1)
+
+    def test_error_reaches_followers(self):
+        flights = SingleFlight()
+        release = threading.Event()
+
+        def compute():
+            release.wait(5)
+            raise ValueError('boom')
+
+        threads, results, errors = self.run_concurrently(flights, compute, 3)
+        while flights.stats()['collapsed'] < 2:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 3)
+        # Nothing is kept after a failure
+        self.assertEqual(flights.do('k', lambda: 'ok'), 'ok')
+
+    def test_sequential_calls_recompute_without_ttl(self):
+        flights = SingleFlight()
+        self.assertEqual(flights.do('k', lambda: 1), 1)
+        self.assertEqual(flights.do('k', lambda: 2), 2)
+
+    def test_micro_ttl(self):
+        flights = SingleFlight()
+        flights.do('k', lambda: 1, ttl=60)
+        self.assertEqual(flights.do('k', lambda: 2, ttl=60), 1)
+        self.assertEqual(flights.stats()['ttl_hits'], 1)
+
+
+class PostCoalescingTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user',
+                                    password='userpassword')
+        cls.admin_user = User.objects.create_superuser(
+            username='admin', password='adminpassword')
+        cls.post = Post.objects.create(title='Sample Post',
+                                       author=cls.user, body='Body')
+        cls.detail_url = reverse('post_detail', kwargs={'pk': cls.post.pk})
+
+    def setUp(self):
+        caching.get_cache().clear()
+        coalescing.flights.reset_stats()
+        self.client.force_authenticate(user=self.user)
+
+    def test_detail_goes_through_coalescer(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['title'],
+                         'Sample Post')
+        self.assertEqual(coalescing.flights.stats()['computed'], 1)
+        response = self.client.get(self.detail_url,
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_micro_ttl(self):
+        self.addCleanup(coalescing.flights.forget)
+        with override_settings(POST_COALESCE_TTL=60):
+            self.client.get(self.detail_url)
+            with self.assertNumQueries(0):
+                response = self.client.get(self.detail_url)
+        self.assertEqual(response.data['id'], self.post.pk)
+        self.assertEqual(coalescing.flights.stats()['ttl_hits'], 1)
+
+    def test_write_drops_micro_ttl_results(self):
+        self.addCleanup(coalescing.flights.forget)
+        with override_settings(POST_COALESCE_TTL=60):
+            self.client.get(self.detail_url)
+            self.client.patch(self.detail_url, {'title': 'Changed'},
+                              format='json')
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.data['title'], 'Changed')
+
+    def test_missing_detail_is_404(self):
+        response = self.client.get(reverse('post_detail', kwargs={'pk': 0}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_only_superuser_list_coalesces(self):
+        self.client.get(reverse('post_list'))
+        self.assertEqual(coalescing.flights.stats()['computed'], 0)
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(reverse('post_list'))
+        self.assertEqual(len(json.loads(response.content)), 1)
+        self.assertEqual(coalescing.flights.stats()['computed'], 1)
+
+    def test_superuser_list_cache_hit_keeps_data(self):
+        self.client.force_authenticate(user=self.admin_user)
+        first = self.client.get(reverse('post_list'))
+        second = self.client.get(reverse('post_list'))
+        self.assertEqual(caching.stats()['hits'], 1)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.data[0]['id'], self.post.pk)
+
+    def test_superuser_list_cache_hit_skips_decoding(self):
+        self.client.force_authenticate(user=self.admin_user)
+        first = self.client.get(reverse('post_list'))
+        with patch('posts.coalescing.json.loads',
+                   side_effect=json.loads) as loads:
+            second = self.client.get(reverse('post_list'))
+            self.assertEqual(caching.stats()['hits'], 1)
+            self.assertEqual(second.content, first.content)
+            loads.assert_not_called()
+            self.assertEqual(second.data, first.data)
+            loads.assert_called_once()
+
+    def test_bulk_write_drops_micro_ttl_results(self):
+        self.addCleanup(coalescing.flights.forget)
+        self.client.force_authenticate(user=self.admin_user)
+        with override_settings(POST_COALESCE_TTL=60):
+            self.client.get(reverse('post_list'))
+            self.client.force_authenticate(user=self.user)
+            self.client.post(reverse('post_bulk'),
+                             [{'title': 'Bulk', 'body': 'Body'}],
+                             format='json')
+            self.client.patch(reverse('post_bulk'),
+                              [{'id': self.post.pk, 'title': 'Bulk edit'}],
+                              format='json')
+            self.client.get(self.detail_url)
+            self.client.force_authenticate(user=self.admin_user)
+            response = self.client.get(reverse('post_list'))
+        titles = {post['title'] for post in response.data}
+        self.assertEqual(titles, {'Bulk', 'Bulk edit'})
+
+    def test_stats_endpoint_reports_coalescing(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(reverse('post_list_cache_stats'))
+        self.assertEqual(response.data['coalescing'], {
+            'computed': 0, 'collapsed': 0, 'ttl_hits': 0, 'timeouts': 0})
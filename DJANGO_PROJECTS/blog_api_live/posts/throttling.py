@@ -0,0 +1,164 @@
+"""Sliding-window throttles whose counters are shared by every worker.
+
+DRF's throttles keep request history in the Django cache, which is
+per-process with locmem, so each gunicorn worker enforces its own
+limit. These throttles keep their counters in a small SQLite database
+in WAL mode (``THROTTLE_STORE_PATH``, in the temp dir by default) that
+all workers on the host open.
+
+Each key has one counter per fixed window. The sliding count is
+estimated from the current and previous windows as
+``previous * (1 - elapsed / duration) + current``, so a check reads two
+rows and bumps one, whatever the rate. DRF's throttles keep a list of
+timestamps instead.
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+def store_path():
+    return str(getattr(settings, "THROTTLE_STORE_PATH", os.path.join(
+        tempfile.gettempdir(), "blog_api_live-throttle.sqlite3")))
+
+
+class SlidingWindowStore:
+    schema = """
+        CREATE TABLE IF NOT EXISTS throttle_counter (
+            key TEXT NOT NULL,
+            window INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (key, window)
+        ) WITHOUT ROWID
+    """
+    # Expired rows are deleted by roughly one check in this many
+    purge_every = 1000
+
+    def __init__(self, path=None):
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self):
+        """This thread's connection, reopened after a fork or path change."""
+        path = self.path or store_path()
+        local = self._local
+        if (getattr(local, "pid", None) != os.getpid()
+                or local.path != path):
+            connection = sqlite3.connect(path, timeout=5,
+                                         isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Counters are not worth an fsync per request
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(self.schema)
+            local.connection, local.pid, local.path = (
+                connection, os.getpid(), path)
+        return local.connection
+
+    def hit(self, key, limit, duration, now=None):
+        """Count one request for ``key`` if it is under ``limit``.
+
+        Returns ``(allowed, wait)``, where ``wait`` is the number of
+        seconds until a request would be allowed again (None if allowed).
+        """
+        now = time.time() if now is None else now
+        window = int(now // duration)
+        elapsed = now - window * duration
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            counts = dict(connection.execute(
+                "SELECT window, count FROM throttle_counter "
+                "WHERE key = ? AND window IN (?, ?)",
+                (key, window - 1, window)))
+            previous = counts.get(window - 1, 0)
+            current = counts.get(window, 0)
+            if previous * (1 - elapsed / duration) + current + 1 > limit:
+                connection.execute("COMMIT")
+                return False, self.wait(previous, current, limit, duration,
+                                        elapsed)
+            connection.execute(
+                "INSERT INTO throttle_counter (key, window, count, expires_at) "
+                "VALUES (?, ?, 1, ?) ON CONFLICT (key, window) "
+                "DO UPDATE SET count = count + 1",
+                (key, window, (window + 2) * duration))
+            if random.randrange(self.purge_every) == 0:
+                connection.execute(
+                    "DELETE FROM throttle_counter WHERE expires_at < ?",
+                    (now, ))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return True, None
+
+    def wait(self, previous, current, limit, duration, elapsed):
+        if previous and current + 1 <= limit:
+            # Until the previous window's weight has decayed far enough
+            wait = duration * (1 - (limit - current - 1) / previous) - elapsed
+        else:
+            wait = duration - elapsed
+        return max(wait, 0)
+
+    def clear(self):
+        self.connection().execute("DELETE FROM throttle_counter")
+
+
+store = SlidingWindowStore()
+
+
+class SharedSlidingWindowThrottle(SimpleRateThrottle):
+    """``SimpleRateThrottle`` backed by the shared ``store``.
+
+    Rates come from ``DEFAULT_THROTTLE_RATES`` at request time; a rate of
+    None disables the scope.
+    """
+    store = store
+
+    def get_rate(self):
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        if self.scope not in rates:
+            raise ImproperlyConfigured(
+                f"No default throttle rate set for '{self.scope}' scope")
+        return rates[self.scope]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self._wait = self.store.hit(self.key, self.num_requests,
+                                             self.duration)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class UserSlidingWindowThrottle(SharedSlidingWindowThrottle):
+    """Limits each authenticated user across all their clients."""
+    scope = "posts_user"
+
+    def get_cache_key(self, request, view):
+        if not request.user.is_authenticated:
+            return None
+        return self.cache_format % {"scope": self.scope,
+                                    "ident": request.user.pk}
+
+
+class IPSlidingWindowThrottle(SharedSlidingWindowThrottle):
+    """Limits each client address, whoever is logged in."""
+    scope = "posts_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope,
+                                    "ident": self.get_ident(request)}
@@ -1,7 +1,18 @@
 from django.urls import path
-from .views import PostList, PostDetail
+from .async_views import AsyncPostList, AsyncPostDetail
+from .views import (PostList, PostDetail, PostBulk, PostExport,
+                    PostSearch, PostChanges, PostListCacheStats)
 
 urlpatterns = [
+    path("bulk/", PostBulk.as_view(), name="post_bulk"),
+    path("export/", PostExport.as_view(), name="post_export"),
+    path("search/", PostSearch.as_view(), name="post_search"),
+    path("changes/", PostChanges.as_view(), name="post_changes"),
+    path("cache/stats/", PostListCacheStats.as_view(),
+         name="post_list_cache_stats"),
+    path("async/", AsyncPostList.as_view(), name="async_post_list"),
+    path("async/<int:pk>/", AsyncPostDetail.as_view(),
+         name="async_post_detail"),
     path("<int:pk>/", PostDetail.as_view(), name="post_detail"),
     path("", PostList.as_view(), name="post_list")
 ]
\ No newline at end of file
@@ -1,23 +1,537 @@
-from rest_framework.generics import (ListCreateAPIView,
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import (GenericAPIView, ListCreateAPIView,
                             RetrieveUpdateDestroyAPIView)
-from .models import Post
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from . import caching, coalescing
+from .conditional import (detail_validators, list_validators,
+                          multi_validators, not_modified, set_validators)
+from .models import Post, PostTombstone
+from .pagination import KeysetPagination
 from .permissions import IsAuthorOrReadOnly
-from .serializers import PostSerializer
+from .search import search_post_ids
+from .serializers import (PostSerializer, PostValuesSerializer,
+                          project_queryset)
+from .throttling import IPSlidingWindowThrottle, UserSlidingWindowThrottle
 
-class PostList(ListCreateAPIView):
+def render_response(view, response):
+    """Render ``response`` inside the view, as finalize_response would."""
+    response.accepted_renderer = view.request.accepted_renderer
+    response.accepted_media_type = view.request.accepted_media_type
+    response.renderer_context = view.get_renderer_context()
+    return response.render()
+
+class AuthorScopedMixin:
+    """Superusers see every post, everyone else only their own."""
+
+    def get_queryset(self):
+        if self.request.user.is_superuser:
+            return Post.objects.select_related("author")
+        return Post.objects.filter(
+            author=self.request.user).select_related("author")
+
+class SparseFieldsMixin:
+    """Leave unrequested columns out of the SELECT on reads."""
+
+    def get_queryset(self):
+        return project_queryset(super().get_queryset(), self.request)
+
+class PostList(SparseFieldsMixin, AuthorScopedMixin, ListCreateAPIView):
     permission_classes = (IsAuthorOrReadOnly, )
+    throttle_classes = (UserSlidingWindowThrottle, IPSlidingWindowThrottle)
     # queryset = Post.objects.all()
     serializer_class = PostSerializer
+    pagination_class = KeysetPagination
+    # Render reads from .values() rows (see PostValuesSerializer)
+    use_values_serializer = True
+    max_ids = 100
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        if "ids" in request.query_params:
+            return self.multi_get(request)
+        if request.user.is_superuser and caching.is_cacheable(request):
+            # Every superuser sees the same list, so their reads coalesce
+            return coalescing.respond(
+                request, coalescing.request_key(request, "post_list"),
+                lambda: self.shared_list(request, *args, **kwargs))
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = list_validators(queryset, request)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        if not caching.is_cacheable(request):
+            response = self.render_list(request, *args, **kwargs)
+            return set_validators(response, etag, last_modified)
+
+        key = caching.response_key(request, etag)
+        entry = caching.lookup(key)
+        if entry is not None:
+            content, content_type = entry
+            response = coalescing.SharedResponse(None, content, content_type)
+        else:
+            rendered = render_response(
+                self, self.render_list(request, *args, **kwargs))
+            caching.store(key, rendered)
+            # Same class as a hit, so callers see one response type
+            response = coalescing.SharedResponse(
+                rendered.data, rendered.content, rendered["Content-Type"])
+        return set_validators(response, etag, last_modified)
+
+    def shared_list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = list_validators(queryset, request)
+        key = caching.response_key(request, etag)
+        entry = caching.lookup(key)
+        if entry is not None:
+            content, content_type = entry
+            # Serve the bytes; SharedResponse decodes data only if asked
+            return (None, content, content_type, etag, last_modified)
+        response = render_response(
+            self, self.render_list(request, *args, **kwargs))
+        caching.store(key, response)
+        return (response.data, response.content, response["Content-Type"],
+                etag, last_modified)
+
+    def render_list(self, request, *args, **kwargs):
+        if not self.use_values_serializer:
+            return super().list(request, *args, **kwargs)
+        serializer = PostValuesSerializer(request)
+        rows = serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                [serializer.to_representation(row) for row in page])
+        return Response([serializer.to_representation(row) for row in rows])
+
+    def multi_get(self, request):
+        """``?ids=3,1,2``: the posts ``PostDetail`` would return, in order.
+
+        One ``id__in`` query replaces a GET per post. Ids that do not
+        exist are listed in ``missing``, ids the permissions refuse in
+        ``forbidden``.
+        """
+        ids = self.get_ids(request)
+        queryset = project_queryset(
+            Post.objects.select_related("author").filter(id__in=ids),
+            request)
+        if self.use_values_serializer:
+            serializer = PostValuesSerializer(request)
+            found = {row["id"]: row for row in serializer.values(queryset)}
+        else:
+            serializer = self.get_serializer()
+            found = queryset.in_bulk(ids)
+
+        etag, last_modified = multi_validators(found.values(), request)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        permissions = self.get_permissions()
+        results, missing, forbidden = [], [], []
+        for pk in ids:
+            post = found.get(pk)
+            if post is None:
+                missing.append(pk)
+            elif not all(permission.has_object_permission(request, self, post)
+                         for permission in permissions):
+                forbidden.append(pk)
+            else:
+                results.append(serializer.to_representation(post))
+        response = Response({"results": results, "missing": missing,
+                             "forbidden": forbidden})
+        return set_validators(response, etag, last_modified)
+
+    def get_ids(self, request):
+        ids = []
+        for value in request.query_params["ids"].split(","):
+            try:
+                pk = int(value)
+            except ValueError:
+                raise ValidationError({"ids": [
+                    "Expected a comma separated list of post ids."]})
+            if pk not in ids:
+                ids.append(pk)
+        if len(ids) > self.max_ids:
+            raise ValidationError({"ids": [
+                f"Ensure this list has at most {self.max_ids} ids."]})
+        return ids
+
+class PostDetail(SparseFieldsMixin, RetrieveUpdateDestroyAPIView):
+    permission_classes = (IsAuthorOrReadOnly, )
+    throttle_classes = (UserSlidingWindowThrottle, IPSlidingWindowThrottle)
+    queryset = Post.objects.select_related("author")
+    serializer_class = PostSerializer
+    use_values_serializer = True
+    values_serializer = None
+
     def get_queryset(self):
-        if self.request.user.is_superuser:
-            return Post.objects.all()
-        return Post.objects.filter(author=self.request.user)
+        queryset = super().get_queryset()
+        if self.values_serializer is not None:
+            return self.values_serializer.values(queryset)
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.use_values_serializer:
+            # get_object() then returns a .values() row
+            self.values_serializer = PostValuesSerializer(request)
+        if caching.is_cacheable(request):
+            # Any authenticated user may read any post, so concurrent
+            # reads of one URL coalesce whoever sends them
+            return coalescing.respond(
+                request, coalescing.request_key(request, "post_detail"),
+                lambda: self.shared_retrieve(request))
+        instance = self.get_object()
+        etag, last_modified = detail_validators(instance, request)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        return set_validators(Response(self.get_data(instance)), etag,
+                              last_modified)
+
+    def shared_retrieve(self, request):
+        instance = self.get_object()
+        etag, last_modified = detail_validators(instance, request)
+        response = render_response(self, Response(self.get_data(instance)))
+        return (response.data, response.content, response["Content-Type"],
+                etag, last_modified)
+
+    def get_data(self, instance):
+        if self.values_serializer is not None:
+            return self.values_serializer.to_representation(instance)
+        return self.get_serializer(instance).data
+
+    def get_object(self):
+        """Resolve writes with the permission predicate in the query.
+
+        A write the user may not make matches no row, so it never loads
+        the post; an ``exists()`` probe then tells 403 from 404.
+        """
+        if self.request.method in SAFE_METHODS:
+            return super().get_object()
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.request.method == "DELETE":
+            # Only the tombstone's columns are needed to delete
+            queryset = queryset.select_related(None).only("id", "author")
+        for permission in self.get_permissions():
+            if hasattr(permission, "filter_queryset"):
+                queryset = permission.filter_queryset(self.request, self,
+                                                      queryset)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = queryset.get(**lookup)
+        except Post.DoesNotExist:
+            if self.get_queryset().filter(**lookup).exists():
+                self.permission_denied(self.request)
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
 
-class PostDetail(RetrieveUpdateDestroyAPIView):
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            PostTombstone.record([instance])
+            instance.delete()
+
+class PostBulk(GenericAPIView):
+    """Create, update or delete many posts in one request.
+
+    ``POST`` takes a list of posts, ``PUT``/``PATCH`` a list of posts with
+    their ``id`` and ``DELETE`` a list of ids. Every item is validated and
+    permission-checked on its own and reported in ``results``; the valid
+    ones are written in batched queries inside one transaction. Pass
+    ``?atomic=true`` to write nothing if any item fails.
+    """
     permission_classes = (IsAuthorOrReadOnly, )
-    queryset = Post.objects.all()
+    queryset = Post.objects.select_related("author")
     serializer_class = PostSerializer
+    batch_size = 500
+    max_items = 5000
+    forbidden = (status.HTTP_403_FORBIDDEN,
+                 {"detail": "You do not have permission to perform "
+                            "this action."})
+    not_found = (status.HTTP_404_NOT_FOUND, {"detail": "Not found."})
+
+    def post(self, request, *args, **kwargs):
+        items = self.get_items(request)
+        serializer = self.get_serializer(data=items, many=True)
+        results, posts = [], []
+        for index, item in enumerate(items):
+            errors, data = self.validate_item(serializer, item)
+            post = Post(author=request.user, **data)
+            if not errors and not self.is_permitted(post):
+                errors = self.forbidden
+            if errors:
+                results.append(self.error_result(index, *errors))
+            else:
+                results.append({"index": index})
+                posts.append(post)
+
+        if self.should_abort(results):
+            return self.batch_response(results)
+        with transaction.atomic():
+            Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        # bulk_create() and bulk_update() send no post_save signals
+        caching.invalidate_authors({post.author_id for post in posts})
+        coalescing.flights.forget()
+        self.fill_results(results, posts, serializer.child,
+                          status.HTTP_201_CREATED)
+        return self.batch_response(results, status.HTTP_201_CREATED)
+
+    def put(self, request, *args, **kwargs):
+        return self.update_items(request, partial=False)
+
+    def patch(self, request, *args, **kwargs):
+        return self.update_items(request, partial=True)
+
+    def update_items(self, request, partial):
+        items = self.get_items(request)
+        serializer = self.get_serializer(data=items, many=True,
+                                         partial=partial)
+        existing = self.get_existing(
+            item.get("id") for item in items if isinstance(item, dict))
+        results, posts, fields = [], [], {"updated_at"}
+        now = timezone.now()
+        for index, item in enumerate(items):
+            errors, post = None, None
+            if isinstance(item, dict):
+                errors, post = self.check_existing(existing, item.get("id"))
+            if not errors:
+                errors, data = self.validate_item(serializer, item)
+            if errors:
+                results.append(self.error_result(index, *errors))
+                continue
+            for attr, value in data.items():
+                setattr(post, attr, value)
+            # bulk_update() bypasses save(), so auto_now is applied here
+            post.updated_at = now
+            fields.update(data)
+            results.append({"index": index})
+            posts.append(post)
+
+        if self.should_abort(results):
+            return self.batch_response(results)
+        with transaction.atomic():
+            Post.objects.bulk_update(posts, sorted(fields),
+                                     batch_size=self.batch_size)
+        caching.invalidate_authors({post.author_id for post in posts})
+        coalescing.flights.forget()
+        self.fill_results(results, posts, serializer.child,
+                          status.HTTP_200_OK)
+        return self.batch_response(results, status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        ids = self.get_items(request)
+        existing = self.get_existing(ids)
+        results, posts = [], []
+        for index, pk in enumerate(ids):
+            errors, post = self.check_existing(existing, pk)
+            if errors:
+                results.append(self.error_result(index, *errors))
+            else:
+                results.append({"index": index,
+                                "status": status.HTTP_204_NO_CONTENT})
+                posts.append(post)
+
+        if self.should_abort(results):
+            return self.batch_response(results)
+        with transaction.atomic():
+            PostTombstone.record(posts)
+            Post.objects.filter(pk__in=[post.pk for post in posts]).delete()
+        return self.batch_response(results, status.HTTP_200_OK)
+
+    def get_items(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({"non_field_errors":
+                                   ["Expected a list of items."]})
+        if len(items) > self.max_items:
+            raise ValidationError({"non_field_errors": [
+                f"Ensure this list has at most {self.max_items} items."]})
+        return items
+
+    def get_existing(self, ids):
+        pks = [pk for pk in ids if isinstance(pk, int)]
+        return self.get_queryset().in_bulk(pks)
+
+    def check_existing(self, existing, pk):
+        post = existing.get(pk) if isinstance(pk, int) else None
+        if post is None:
+            return self.not_found, None
+        if not self.is_permitted(post):
+            return self.forbidden, None
+        return None, post
+
+    def validate_item(self, serializer, item):
+        try:
+            return None, serializer.child.run_validation(item)
+        except ValidationError as exc:
+            return (status.HTTP_400_BAD_REQUEST, exc.detail), {}
+
+    def is_permitted(self, obj):
+        return all(permission.has_object_permission(self.request, self, obj)
+                   for permission in self.get_permissions())
+
+    def error_result(self, index, code, errors):
+        return {"index": index, "status": code, "errors": errors}
+
+    def fill_results(self, results, posts, serializer, code):
+        written = iter(posts)
+        for result in results:
+            if "errors" not in result:
+                result["status"] = code
+                result["data"] = serializer.to_representation(next(written))
+
+    def should_abort(self, results):
+        atomic = self.request.query_params.get("atomic", "")
+        return (atomic.lower() in ("1", "true", "yes")
+                and any("errors" in result for result in results))
+
+    def batch_response(self, results, success_status=None):
+        if success_status is None:
+            code = status.HTTP_400_BAD_REQUEST
+        elif any("errors" in result for result in results):
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = success_status
+        return Response({"results": results}, status=code)
+
+class PostListCacheStats(APIView):
+    """Read-path counters (admins only).
+
+    Hit/miss counts of the ``PostList`` response cache plus, under
+    ``coalescing``, this worker's single-flight counters: ``collapsed``
+    is the number of duplicate computations avoided.
+    """
+    permission_classes = (IsAdminUser, )
+
+    def get(self, request, *args, **kwargs):
+        return Response({**caching.stats(),
+                         "coalescing": coalescing.flights.stats()})
+
+    def delete(self, request, *args, **kwargs):
+        caching.reset_stats()
+        coalescing.flights.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class PostExport(SparseFieldsMixin, AuthorScopedMixin, GenericAPIView):
+    """Stream the caller's posts as newline-delimited JSON.
+
+    Rows are read with a chunked ``iterator()`` and serialized one at a
+    time, so memory stays flat however large the table is.
+    """
+    permission_classes = (IsAuthorOrReadOnly, )
+    serializer_class = PostSerializer
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).order_by("id")
+        serializer = self.get_serializer()
+        renderer = JSONRenderer()
+
+        def rows():
+            for post in queryset.iterator(chunk_size=self.chunk_size):
+                yield renderer.render(serializer.to_representation(post))
+                yield b"\n"
+
+        response = StreamingHttpResponse(
+            rows(), content_type="application/x-ndjson")
+        response["Content-Disposition"] = 'attachment; filename="posts.ndjson"'
+        return response
+
+class PostSearch(SparseFieldsMixin, AuthorScopedMixin, GenericAPIView):
+    """Full-text search over the caller's posts: ``?q=<words>``.
+
+    Results are ranked by bm25 (title hits weigh more than body hits) and
+    carry a ``snippet`` of the match wrapped in ``<mark>`` tags.
+    """
+    permission_classes = (IsAuthorOrReadOnly, )
+    serializer_class = PostSerializer
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        text = request.query_params.get("q", "")
+        try:
+            limit = int(request.query_params.get("limit",
+                                                 self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": ["A valid integer is required."]})
+        limit = max(1, min(limit, self.max_limit))
+
+        author = None if request.user.is_superuser else request.user
+        hits = search_post_ids(text, author=author, limit=limit)
+        posts = self.get_queryset().in_bulk([pk for pk, _, _ in hits])
+        serializer = self.get_serializer()
+        results = []
+        for pk, rank, snippet in hits:
+            if pk not in posts:
+                continue
+            data = serializer.to_representation(posts[pk])
+            data["rank"] = rank
+            data["snippet"] = snippet
+            results.append(data)
+        return Response({"results": results})
+
+class PostChanges(SparseFieldsMixin, AuthorScopedMixin, GenericAPIView):
+    """Changes feed for offline clients: ``?since=<cursor>``.
+
+    Returns the caller's posts updated after ``since`` and the ids of
+    posts deleted after it, plus the ``cursor`` to send next time.
+    Without ``since`` every post is returned (initial sync).
+    """
+    permission_classes = (IsAuthorOrReadOnly, )
+    serializer_class = PostSerializer
+
+    def get(self, request, *args, **kwargs):
+        since = self.get_since(request)
+        changed = self.get_queryset().order_by("updated_at", "id")
+        deleted = PostTombstone.objects.none()
+        if since is not None:
+            changed = changed.filter(updated_at__gt=since)
+            deleted = PostTombstone.objects.filter(deleted_at__gt=since)
+            if not request.user.is_superuser:
+                deleted = deleted.filter(author=request.user)
+        changed = list(changed)
+        deleted = list(deleted.order_by("deleted_at")
+                       .values_list("post_id", "deleted_at"))
+
+        marks = [post.updated_at for post in changed]
+        marks += [deleted_at for _, deleted_at in deleted]
+        cursor = max(marks) if marks else since
+        return Response({
+            "changed": self.get_serializer(changed, many=True).data,
+            "deleted": [post_id for post_id, _ in deleted],
+            "cursor": self.format_cursor(cursor),
+        })
+
+    def format_cursor(self, cursor):
+        if cursor is None:
+            return None
+        # "Z" rather than "+00:00" so the cursor survives naive URL quoting
+        return cursor.isoformat().replace("+00:00", "Z")
+
+    def get_since(self, request):
+        value = request.query_params.get("since")
+        if not value:
+            return None
+        try:
+            since = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise ValidationError(
+                {"since": ["Expected a cursor or ISO 8601 timestamp."]})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
+
+    def ready(self):
+        from . import diagnostics, signals  # noqa: F401
+
+        diagnostics.start(getattr(settings, "BLOG_DIAGNOSTICS_LEVEL", "INFO"))
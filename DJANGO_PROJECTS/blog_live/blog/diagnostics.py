@@ -0,0 +1,46 @@
+"""Request diagnostics that never block the request thread.
+
+Records sent to the ``blog.diagnostics`` logger go onto an in-memory
+queue; a ``QueueListener`` thread formats them and writes them to
+stderr. The request only pays for putting a record on the queue, and
+nothing at all when the level is disabled (``BLOG_DIAGNOSTICS_LEVEL``,
+per-request lines are logged at DEBUG).
+"""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+logger = logging.getLogger("blog.diagnostics")
+
+_listener = None
+
+
+def start(level="INFO", handlers=None):
+    global _listener
+    if _listener is not None:
+        return
+    if handlers is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s %(message)s"))
+        handlers = [handler]
+    records = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(records))
+    logger.setLevel(level)
+    logger.propagate = False
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop)
+
+
+def stop():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in list(logger.handlers):
+        if isinstance(handler, QueueHandler):
+            logger.removeHandler(handler)
+    _listener = None
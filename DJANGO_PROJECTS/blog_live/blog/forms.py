@@ -0,0 +1,46 @@
+from django import forms
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from .models import Post
+
+
+class AuthorLookupWidget(forms.Widget):
+    """A search box backed by ``AuthorLookupView`` instead of a
+    ``<select>`` listing every user. Only the selected user, if any, is
+    read when rendering."""
+    template_name = "blog/widgets/author_lookup.html"
+
+    class Media:
+        js = ["js/author_lookup.js"]
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["lookup_url"] = reverse("author_lookup")
+        context["widget"]["username"] = self.username(value)
+        return context
+
+    def username(self, value):
+        if value in (None, ""):
+            return ""
+        try:
+            return (get_user_model().objects.filter(pk=value)
+                    .values_list("username", flat=True).first() or "")
+        except (TypeError, ValueError):
+            return ""
+
+
+class PostForm(forms.ModelForm):
+    class Meta:
+        model = Post
+        fields = ["title", "author", "body"]
+        # ModelChoiceField validates the submitted id with a single
+        # ``get(pk=...)``; this widget never iterates its choices.
+        widgets = {"author": AuthorLookupWidget}
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        # The form field has already loaded the author by primary key;
+        # the model's ForeignKey check would query for it a second time.
+        exclude.add("author")
+        return exclude
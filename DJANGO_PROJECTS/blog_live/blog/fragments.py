@@ -0,0 +1,95 @@
+"""Versioned caching of rendered template fragments.
+
+Every post has a version token, and so does the post list as a whole.
+Both are part of the fragment cache keys, so saving or deleting a post
+just replaces its token and the list's (see ``blog.signals``): stale
+fragments are never looked up again and age out of the cache on their
+own. Nothing is scanned or deleted.
+
+The versions live in the same cache as the fragments, so with a shared
+backend every process sees a bump at once. Hit and miss counts are per
+process.
+"""
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+LIST_VERSION_KEY = "fragments:posts:version"
+
+
+def get_cache():
+    return caches[getattr(settings, "BLOG_FRAGMENT_CACHE", "default")]
+
+
+def fragment_timeout():
+    return getattr(settings, "BLOG_FRAGMENT_CACHE_TTL", 3600)
+
+
+def post_version_key(pk):
+    return f"fragments:post:{pk}:version"
+
+
+def get_version(key):
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        # First use, or the token was evicted: any fresh token will do,
+        # as long as every process agrees on it.
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_posts(pks):
+    """New versions for ``pks`` and the post list, in one round trip."""
+    versions = {post_version_key(pk): uuid.uuid4().hex for pk in pks}
+    versions[LIST_VERSION_KEY] = uuid.uuid4().hex
+    get_cache().set_many(versions, None)
+
+
+def post_key(name, post):
+    return f"fragments:{name}:{post.pk}:{get_version(post_version_key(post.pk))}"
+
+
+def list_key(name, vary_on):
+    suffix = ":".join(str(value) for value in vary_on)
+    return f"fragments:{name}:{get_version(LIST_VERSION_KEY)}:{suffix}"
+
+
+class FragmentStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def record(self, name, hit):
+        with self.lock:
+            self.counts[name]["hits" if hit else "misses"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            report = {}
+            for name, counts in sorted(self.counts.items()):
+                total = counts["hits"] + counts["misses"]
+                report[name] = dict(
+                    counts, hit_ratio=round(counts["hits"] / total, 4))
+            return report
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+
+stats = FragmentStats()
+
+
+def cached_render(name, key, render):
+    cache = get_cache()
+    content = cache.get(key)
+    stats.record(name, content is not None)
+    if content is None:
+        content = render()
+        cache.set(key, content, fragment_timeout())
+    return content
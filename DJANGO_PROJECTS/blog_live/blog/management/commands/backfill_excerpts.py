@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import fragments
+from blog.models import Post, make_excerpt
+
+
+class Command(BaseCommand):
+    help = ("Fill in Post.excerpt for rows that have none (or every row "
+            "with --all), in id order, one transaction per batch.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--all", action="store_true",
+                            help="Recompute excerpts that are already set.")
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.only("id", "body").order_by("id")
+        if not options["all"]:
+            queryset = queryset.filter(excerpt="")
+        last_id, updated = 0, 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)
+                         [:options["batch_size"]])
+            if not batch:
+                break
+            for post in batch:
+                post.excerpt = make_excerpt(post.body)
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, ["excerpt"])
+            # bulk_update() sends no signals
+            fragments.bump_posts(post.pk for post in batch)
+            last_id = batch[-1].pk
+            updated += len(batch)
+            self.stdout.write(f"{updated} posts updated (up to id {last_id})")
+        self.stdout.write(self.style.SUCCESS(f"Done: {updated} posts."))
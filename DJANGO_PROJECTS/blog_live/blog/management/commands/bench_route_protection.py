@@ -0,0 +1,75 @@
+import json
+import timeit
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse, HttpResponseRedirect
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.urls.resolvers import URLResolver
+
+from blog.custom_user_middleware import ProtectSpecificRoutesMiddleware
+
+PATHS = ["/", "/post/1/", "/post/1/edit", "/accounts/login/",
+         "/static/css/base.css"]
+
+
+def legacy_check(request):
+    """The previous per-request check: rebuild the list, resolve again."""
+    protected_url_names = ["home", "post_new", "post_edit", "post_delete"]
+    try:
+        current_url_name = resolve(request.path_info).url_name
+    except Exception:
+        current_url_name = None
+    if (current_url_name in protected_url_names
+            and not request.user.is_authenticated):
+        return HttpResponseRedirect(reverse("login"))
+    return None
+
+
+class Command(BaseCommand):
+    help = ("Time the route protection check per request, before (list + "
+            "resolve()) and after (frozenset lookup on resolver_match), "
+            "and count resolver calls. Prints JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = []
+        for path in PATHS:
+            request = factory.get(path)
+            request.user = AnonymousUser()
+            try:
+                request.resolver_match = resolve(path)
+            except Exception:
+                # Django 404s these before any process_view runs
+                request.resolver_match = None
+            requests.append(request)
+        middleware = ProtectSpecificRoutesMiddleware(
+            lambda request: HttpResponse())
+
+        def before():
+            for request in requests:
+                legacy_check(request)
+
+        def after():
+            for request in requests:
+                if request.resolver_match is not None:
+                    middleware.process_view(request, None, (), {})
+
+        report = {"paths": PATHS, "number": options["number"]}
+        for label, func in (("before", before), ("after", after)):
+            with mock.patch.object(URLResolver, "resolve", autospec=True,
+                                   side_effect=URLResolver.resolve) as spy:
+                func()
+            seconds = min(timeit.repeat(func, number=options["number"],
+                                        repeat=3))
+            report[label] = {
+                "resolver_calls_per_request": spy.call_count / len(PATHS),
+                "us_per_request": round(
+                    seconds / options["number"] / len(PATHS) * 1e6, 3),
+            }
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,86 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import (CaptureQueriesContext, override_settings,
+                               setup_test_environment,
+                               teardown_test_environment)
+from django.urls import reverse
+
+from blog.models import Post
+from blog.user_cache import users
+
+STOCK = "django.contrib.auth.middleware.AuthenticationMiddleware"
+CACHED = "blog.custom_user_middleware.CachedUserMiddleware"
+
+
+class Command(BaseCommand):
+    help = ("Compare queries and latency per logged-in request with "
+            "Django's AuthenticationMiddleware (before) and "
+            "CachedUserMiddleware (after). Runs against a throwaway "
+            "test database and prints JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--posts", type=int, default=20)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, options):
+        user = get_user_model().objects.create_user(
+            username="bench", password="bench-password")
+        Post.objects.bulk_create(
+            Post(title=f"Post {i}", body="x" * 200, author=user)
+            for i in range(options["posts"]))
+        paths = [reverse("home"),
+                 reverse("post_detail", args=[Post.objects.first().pk])]
+
+        report = {"requests": options["requests"], "paths": paths}
+        for label, middleware in (("before", STOCK), ("after", CACHED)):
+            users.clear()
+            users.reset_stats()
+            with override_settings(MIDDLEWARE=self.middleware(middleware)):
+                client = Client()
+                client.force_login(user)
+                report[label] = self.measure(client, paths,
+                                             options["requests"])
+            report[label]["user_cache"] = users.stats()
+        return report
+
+    def middleware(self, replacement):
+        from django.conf import settings
+        return [replacement if name in (STOCK, CACHED) else name
+                for name in settings.MIDDLEWARE]
+
+    def measure(self, client, paths, count):
+        user_table = get_user_model()._meta.db_table
+        latencies, queries, user_queries = [], 0, 0
+        for i in range(count):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.get(paths[i % len(paths)])
+                latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.status_code
+            queries += len(captured)
+            user_queries += sum(f'FROM "{user_table}"' in query["sql"]
+                                for query in captured)
+        latencies.sort()
+        return {
+            "queries_per_request": round(queries / count, 2),
+            "user_queries_per_request": round(user_queries / count, 2),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "p50_ms": round(latencies[len(latencies) // 2], 3),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        }
@@ -1,11 +1,26 @@
 from django.db import models
 from django.urls import reverse
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 200
+
+
+def make_excerpt(body):
+    """The first ``EXCERPT_LENGTH`` characters of ``body``, whitespace
+    collapsed, cut with an ellipsis if it is longer."""
+    return Truncator(" ".join(body.split())).chars(EXCERPT_LENGTH)
+
 
 class Post(models.Model):
 
     title = models.CharField(max_length=200)
     author = models.ForeignKey("auth.User", on_delete=models.CASCADE)
     body = models.TextField()
+    # Kept in step with ``body`` by save(); rows written by bulk_create(),
+    # update() or before the column existed are filled in by the
+    # ``backfill_excerpts`` command.
+    excerpt = models.CharField(max_length=255, blank=True, editable=False,
+                               db_index=True)
 
     def __str__(self):
         return self.title
@@ -13,3 +28,10 @@ class Post(models.Model):
     def get_absolute_url(self):
         return reverse('post_detail', kwargs={"pk": self.pk}) 
 
+    def save(self, *args, **kwargs):
+        if "body" not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.body)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "body" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "excerpt"}
+        super().save(*args, **kwargs)
@@ -0,0 +1,45 @@
+from django.http import Http404
+
+
+class KeysetPage:
+    """One page of posts, newest first, starting below ``?after=<id>``.
+
+    Every page is an ``id < after ORDER BY id DESC LIMIT n`` primary-key
+    range read, so page 500 costs the same as page 1; Django's Paginator
+    would ``COUNT(*)`` the table and ``OFFSET`` past every earlier row.
+    One extra row is fetched to tell whether an older page exists.
+    """
+
+    after_query_param = "after"
+
+    def __init__(self, queryset, request, per_page):
+        self.after = self.get_after(request)
+        queryset = queryset.order_by("-id")
+        if self.after is not None:
+            queryset = queryset.filter(id__lt=self.after)
+        rows = list(queryset[:per_page + 1])
+        self.object_list = rows[:per_page]
+        self.has_next = len(rows) > per_page
+
+    def get_after(self, request):
+        value = request.GET.get(self.after_query_param)
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise Http404("Invalid page")
+
+    @property
+    def has_previous(self):
+        return self.after is not None
+
+    @property
+    def next_after(self):
+        return self.object_list[-1].pk if self.has_next else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
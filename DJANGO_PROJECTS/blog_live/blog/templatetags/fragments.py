@@ -0,0 +1,69 @@
+from django import template
+
+from blog import fragments
+
+register = template.Library()
+
+
+class PostFragmentNode(template.Node):
+    def __init__(self, nodelist, name, post):
+        self.nodelist = nodelist
+        self.name = name
+        self.post = post
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        post = self.post.resolve(context)
+        return fragments.cached_render(
+            name, fragments.post_key(name, post),
+            lambda: self.nodelist.render(context))
+
+
+class PostListFragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        vary_on = [value.resolve(context) for value in self.vary_on]
+        return fragments.cached_render(
+            name, fragments.list_key(name, vary_on),
+            lambda: self.nodelist.render(context))
+
+
+@register.tag
+def cachepost(parser, token):
+    """
+    Cache the enclosed fragment until ``post`` is saved or deleted::
+
+        {% cachepost "entry" post %} ... {% endcachepost %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' takes a fragment name and a post.")
+    nodelist = parser.parse(("endcachepost",))
+    parser.delete_first_token()
+    return PostFragmentNode(nodelist, parser.compile_filter(bits[1]),
+                            parser.compile_filter(bits[2]))
+
+
+@register.tag
+def cacheposts(parser, token):
+    """
+    Cache the enclosed fragment until any post is saved or deleted,
+    varying on the remaining arguments::
+
+        {% cacheposts "home" page_obj.after %} ... {% endcacheposts %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' takes a fragment name.")
+    nodelist = parser.parse(("endcacheposts",))
+    parser.delete_first_token()
+    return PostListFragmentNode(
+        nodelist, parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]])
@@ -1,7 +1,19 @@
+import logging
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
-from django.urls import reverse
-from .models import Post
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+from django.urls.resolvers import URLResolver
+from . import fragments
+from .custom_user_middleware import ProtectSpecificRoutesMiddleware
+from .diagnostics import logger
+from .forms import PostForm
+from .models import EXCERPT_LENGTH, Post
+from .user_cache import users
 
 class BlogTests(TestCase):
     @classmethod
@@ -76,4 +88,397 @@ class BlogTests(TestCase):
     def test_post_deleteview(self):
         response = self.client.post(reverse("post_delete", args="1"))
         self.assertEqual(response.status_code, 302)
-        self.assertIsNone(Post.objects.last())
\ No newline at end of file
+        self.assertIsNone(Post.objects.last())
+
+
+class CachedUserMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="cached", password="secret")
+        cls.post = Post.objects.create(title="Title", body="Body",
+                                       author=cls.user)
+
+    def setUp(self):
+        users.clear()
+        users.reset_stats()
+        self.addCleanup(users.clear)
+        self.client.force_login(self.user)
+        self.path = reverse("post_detail", args=[self.post.pk])
+
+    def test_user_served_from_cache(self):
+        self.client.get(self.path)
+        # Session + post + the template's ``user.is_authenticated``
+        with self.assertNumQueries(2):
+            response = self.client.get(self.path)
+        self.assertEqual(response.context["user"], self.user)
+        self.assertEqual(users.stats()["hits"], 1)
+
+    def test_each_request_gets_its_own_copy(self):
+        first = self.client.get(self.path).context["user"]
+        first.first_name = "Changed"
+        second = self.client.get(self.path).context["user"]
+        self.assertIsNot(first, second)
+        self.assertEqual(second.first_name, "")
+
+    def test_save_invalidates(self):
+        self.client.get(self.path)
+        self.user.first_name = "Renamed"
+        self.user.save()
+        with self.assertNumQueries(3):
+            response = self.client.get(self.path)
+        self.assertEqual(response.context["user"].first_name, "Renamed")
+
+    def test_inactive_user_is_logged_out(self):
+        self.client.get(self.path)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.path)
+        self.assertFalse(response.context["user"].is_authenticated)
+
+    def test_logout_invalidates(self):
+        self.client.get(self.path)
+        self.assertEqual(users.stats()["size"], 1)
+        self.client.post(reverse("logout"))
+        self.assertEqual(users.stats()["size"], 0)
+
+    def test_stale_session_hash_falls_back_to_database(self):
+        self.client.get(self.path)
+        session = self.client.session
+        session["_auth_user_hash"] = "stale"
+        session.save()
+        with self.assertLogs(logger, "INFO") as logs:
+            response = self.client.get(self.path)
+        self.assertFalse(response.context["user"].is_authenticated)
+        self.assertIn("Session hash mismatch", logs.output[0])
+
+    @override_settings(USER_CACHE_TTL=0)
+    def test_zero_ttl_disables_cache(self):
+        self.client.get(self.path)
+        with self.assertNumQueries(3):
+            self.client.get(self.path)
+
+    def test_expired_entries_are_reloaded(self):
+        users.set(self.user.pk, self.user, users.generation, now=0)
+        self.assertIsNone(users.get(self.user.pk, now=31))
+
+    def test_set_skipped_after_concurrent_invalidation(self):
+        generation = users.generation
+        users.invalidate(self.user.pk)
+        users.set(self.user.pk, self.user, generation)
+        self.assertIsNone(users.get(self.user.pk))
+
+    def test_request_diagnostics(self):
+        self.client.get(self.path)
+        level = logger.level
+        logger.setLevel(logging.DEBUG)
+        self.addCleanup(logger.setLevel, level)
+        with self.assertLogs(logger, "DEBUG") as logs:
+            self.client.get(self.path)
+        self.assertRegex(logs.output[0],
+                         rf"GET {self.path} 200 [\d.]+ms user=cache")
+
+    def test_login_and_logout_diagnostics(self):
+        self.client.logout()
+        level = logger.level
+        logger.setLevel(logging.DEBUG)
+        self.addCleanup(logger.setLevel, level)
+        with self.assertLogs(logger, "DEBUG") as logs:
+            response = self.client.post(reverse("login"), {
+                "username": "cached", "password": "secret"})
+            self.assertEqual(response.status_code, 302)
+            response = self.client.post(reverse("logout"))
+            self.assertEqual(response.status_code, 302)
+        self.assertRegex(logs.output[0], r"POST /accounts/login/ 302 ")
+        self.assertRegex(logs.output[1], r"POST /accounts/logout/ 302 ")
+
+
+
+class ProtectSpecificRoutesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="protected", password="secret")
+        cls.post = Post.objects.create(title="Title", body="Body",
+                                       author=cls.user)
+
+    def test_protected_route_redirects_anonymous(self):
+        response = self.client.get(reverse("post_edit", args=[self.post.pk]))
+        self.assertRedirects(response, reverse("login"))
+
+    def test_protected_route_allows_authenticated(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_unprotected_route_is_public(self):
+        response = self.client.get(reverse("post_detail", args=[self.post.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_path_is_a_404(self):
+        self.assertEqual(self.client.get("/no/such/page/").status_code, 404)
+
+    @override_settings(PROTECTED_URL_NAMES=["post_detail"])
+    def test_table_comes_from_settings(self):
+        response = self.client.get(reverse("post_detail", args=[self.post.pk]))
+        self.assertRedirects(response, reverse("login"))
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_static_paths_are_bypassed(self):
+        request = RequestFactory().get("/static/css/base.css")
+        request.resolver_match = resolve("/")
+        middleware = ProtectSpecificRoutesMiddleware(None)
+        self.assertIsNone(middleware.process_view(request, None, (), {}))
+
+    def test_bypass_is_checked_before_the_table(self):
+        request = RequestFactory().get("/static/css/base.css")
+        # resolver_match is None: an asset path must not look it up
+        self.assertIsNone(request.resolver_match)
+        middleware = ProtectSpecificRoutesMiddleware(None)
+        self.assertIsNone(middleware.process_view(request, None, (), {}))
+
+    def test_no_extra_resolver_work(self):
+        path = reverse("post_edit", args=[self.post.pk])
+
+        def resolver_calls():
+            with mock.patch.object(URLResolver, "resolve", autospec=True,
+                                   side_effect=URLResolver.resolve) as spy:
+                self.client.get(path)
+            return spy.call_count
+
+        with self.modify_settings(MIDDLEWARE={"remove": [
+                "blog.custom_user_middleware.ProtectSpecificRoutesMiddleware"
+        ]}):
+            unprotected = resolver_calls()
+        self.assertEqual(resolver_calls(), unprotected)
+
+
+class PostListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="paged", password="secret")
+        cls.posts = [Post.objects.create(title=f"Post {i}",
+                                         body=f"Body {i} " + "word " * 100,
+                                         author=cls.user)
+                     for i in range(25)]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_excerpt_maintained_on_save(self):
+        post = self.posts[0]
+        self.assertEqual(len(post.excerpt), EXCERPT_LENGTH)
+        self.assertTrue(post.excerpt.startswith("Body 0 word"))
+        self.assertTrue(post.excerpt.endswith("…"))
+        post.body = "Short\n\n  body"
+        post.save(update_fields=["body"])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, "Short body")
+
+    def test_first_page(self):
+        response = self.client.get(reverse("home"))
+        titles = [post.title for post in response.context["post_list"]]
+        self.assertEqual(titles, [f"Post {i}" for i in range(24, 14, -1)])
+        self.assertTrue(response.context["is_paginated"])
+        self.assertContains(response, f"?after={self.posts[15].pk}")
+        self.assertNotContains(response, "Newest posts")
+
+    def test_list_renders_excerpt_without_loading_body(self):
+        users.clear()
+        self.addCleanup(users.clear)
+        # Session, user, one page of posts
+        with self.assertNumQueries(3) as captured:
+            response = self.client.get(reverse("home"))
+        post_query = captured[-1]["sql"]
+        self.assertNotIn('"body"', post_query)
+        self.assertIn("ORDER BY", post_query)
+        self.assertContains(response, self.posts[24].excerpt)
+        self.assertNotContains(response, self.posts[24].body)
+
+    def test_last_page(self):
+        response = self.client.get(reverse("home"),
+                                   {"after": self.posts[5].pk})
+        titles = [post.title for post in response.context["post_list"]]
+        self.assertEqual(titles, [f"Post {i}" for i in range(4, -1, -1)])
+        self.assertFalse(response.context["page_obj"].has_next)
+        self.assertContains(response, "Newest posts")
+
+    def test_invalid_after_is_a_404(self):
+        response = self.client.get(reverse("home"), {"after": "x"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_backfill_excerpts(self):
+        Post.objects.update(excerpt="")
+        Post.objects.filter(pk=self.posts[0].pk).update(excerpt="kept")
+        out = StringIO()
+        call_command("backfill_excerpts", batch_size=10, stdout=out)
+        self.assertIn("Done: 24 posts.", out.getvalue())
+        self.assertFalse(Post.objects.filter(excerpt="").exists())
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).excerpt,
+                         "kept")
+        call_command("backfill_excerpts", "--all", stdout=out)
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).excerpt,
+                         self.posts[0].excerpt)
+
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username="fragments", password="secret", is_staff=True)
+        cls.post = Post.objects.create(title="Cached", body="Cached body",
+                                       author=cls.user)
+        cls.other = Post.objects.create(title="Other", body="Other body",
+                                        author=cls.user)
+
+    def setUp(self):
+        fragments.get_cache().clear()
+        fragments.stats.reset()
+        self.client.force_login(self.user)
+
+    def test_home_served_from_list_fragment(self):
+        self.client.get(reverse("home"))
+        self.assertEqual(fragments.stats.snapshot()["home"]["misses"], 1)
+        self.assertEqual(fragments.stats.snapshot()["post_entry"]["misses"], 2)
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "Cached body")
+        report = fragments.stats.snapshot()
+        self.assertEqual(report["home"], {"hits": 1, "misses": 1,
+                                           "hit_ratio": 0.5})
+        # The list fragment hit means the entries were not looked up
+        self.assertEqual(report["post_entry"]["hits"], 0)
+
+    def test_save_rerenders_only_that_post(self):
+        self.client.get(reverse("home"))
+        self.post.title = "Renamed"
+        self.post.save()
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "Renamed")
+        report = fragments.stats.snapshot()
+        self.assertEqual(report["home"]["misses"], 2)
+        self.assertEqual(report["post_entry"], {"hits": 1, "misses": 3,
+                                                 "hit_ratio": 0.25})
+
+    def test_delete_invalidates_list(self):
+        self.client.get(reverse("home"))
+        self.other.delete()
+        response = self.client.get(reverse("home"))
+        self.assertNotContains(response, "Other body")
+
+    def test_detail_fragment(self):
+        path = reverse("post_detail", args=[self.post.pk])
+        self.client.get(path)
+        self.client.get(path)
+        self.assertEqual(fragments.stats.snapshot()["post_detail"]["hits"], 1)
+        Post.objects.filter(pk=self.post.pk).update(body="Updated body")
+        # update() sends no signal until the version is bumped
+        self.assertNotContains(self.client.get(path), "Updated body")
+        fragments.bump_posts([self.post.pk])
+        self.assertContains(self.client.get(path), "Updated body")
+
+    def test_evicted_version_is_recreated(self):
+        first = fragments.post_key("post_entry", self.post)
+        fragments.get_cache().delete(fragments.post_version_key(self.post.pk))
+        second = fragments.post_key("post_entry", self.post)
+        self.assertNotEqual(first, second)
+        self.assertEqual(second, fragments.post_key("post_entry", self.post))
+
+    def test_stats_endpoint(self):
+        self.client.get(reverse("home"))
+        response = self.client.get(reverse("fragment_cache_stats"))
+        self.assertEqual(response.json()["home"]["misses"], 1)
+        response = self.client.delete(reverse("fragment_cache_stats"))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get(
+            reverse("fragment_cache_stats")).json(), {})
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.client.force_login(get_user_model().objects.create_user(
+            username="reader", password="secret"))
+        response = self.client.get(reverse("fragment_cache_stats"))
+        self.assertEqual(response.status_code, 403)
+
+
+class AuthorLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        User.objects.bulk_create(User(username=f"writer{i:02}")
+                                 for i in range(30))
+        User.objects.bulk_create(User(username=name)
+                                 for name in ("wright", "xavier"))
+        cls.user = User.objects.create_user(username="editor",
+                                            password="secret")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def lookup(self, **params):
+        response = self.client.get(reverse("author_lookup"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_prefix_pages(self):
+        first = self.lookup(q="wri")
+        self.assertEqual([row["username"] for row in first["results"]],
+                         ["wright"] + [f"writer{i:02}" for i in range(19)])
+        self.assertEqual(first["next"], "writer18")
+        second = self.lookup(q="wri", after=first["next"])
+        self.assertEqual([row["username"] for row in second["results"]],
+                         [f"writer{i:02}" for i in range(19, 30)])
+        self.assertIsNone(second["next"])
+
+    def test_results_carry_ids(self):
+        (row,) = self.lookup(q="xav")["results"]
+        self.assertEqual(row, {"id": get_user_model().objects.get(
+            username="xavier").pk, "username": "xavier"})
+
+    def test_lookup_is_an_index_range_scan(self):
+        query = (get_user_model().objects.order_by("username")
+                 .filter(username__gte="wri", username__lt="wrj")
+                 .values("id", "username")[:21])
+        sql, params = query.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("INDEX", plan)
+        self.assertIn("username>? AND username<?", plan)
+
+    def test_anonymous_is_forbidden(self):
+        self.client.logout()
+        response = self.client.get(reverse("author_lookup"), {"q": "w"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_post_new_renders_no_user_list(self):
+        response = self.client.get(reverse("post_new"))
+        self.assertNotContains(response, "<option")
+        self.assertNotContains(response, "writer00")
+        self.assertContains(response, reverse("author_lookup"))
+        self.assertContains(response, "js/author_lookup.js")
+
+    def test_widget_shows_selected_username(self):
+        form = PostForm(initial={"author": self.user.pk})
+        with self.assertNumQueries(1):
+            html = str(form["author"])
+        self.assertIn('value="editor"', html)
+
+    def test_validation_is_one_lookup(self):
+        form = PostForm({"title": "Title", "body": "Body",
+                         "author": self.user.pk})
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["author"], self.user)
+
+    def test_create_post_with_picked_author(self):
+        response = self.client.post(reverse("post_new"), {
+            "title": "Picked", "body": "Body", "author": self.user.pk})
+        post = Post.objects.get(title="Picked")
+        self.assertRedirects(response, post.get_absolute_url())
+        self.assertEqual(post.author, self.user)
+
+    def test_unknown_author_is_invalid(self):
+        form = PostForm({"title": "Title", "body": "Body", "author": 0})
+        self.assertFalse(form.is_valid())
+        self.assertIn("author", form.errors)
@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import (BlogListView,
+from .views import (AuthorLookupView,
+                     BlogListView,
                      BlogDetailView,   
                      BlogCreateView, 
                      BlogUpdateView,
                      BlogDeleteView,
+                     FragmentCacheStatsView,
                      )
 
 
@@ -13,5 +15,8 @@ urlpatterns = [
     path("post/new/", BlogCreateView.as_view(), name='post_new'),
     path("post/<int:pk>/edit", BlogUpdateView.as_view(), name='post_edit'),
     path("post/<int:pk>/delete", BlogDeleteView.as_view(), name='post_delete'),
+    path("authors/", AuthorLookupView.as_view(), name='author_lookup'),
+    path("debug/fragments/", FragmentCacheStatsView.as_view(),
+         name='fragment_cache_stats'),
 ]
 
@@ -0,0 +1,139 @@
+"""A short-lived, per-process cache of session users.
+
+``AuthenticationMiddleware`` loads the session's user with one query on
+every request that touches ``request.user``. ``get_user`` serves it from
+this cache instead: the row is kept for ``USER_CACHE_TTL`` seconds and
+each request gets its own copy, so a view that changes ``request.user``
+never leaks into another request.
+
+Saving, deleting or logging a user out drops the entry in this process
+(see ``blog.signals``). Other processes hold a stale row for at most the
+TTL, which is why it is kept short.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import AnonymousUser
+from django.db.models.base import ModelState
+from django.utils.crypto import constant_time_compare
+
+from .diagnostics import logger
+
+
+class UserCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        # Bumped by every invalidation, so a row read from the database
+        # before a concurrent save is not stored after it.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self):
+        return getattr(settings, "USER_CACHE_TTL", 30)
+
+    @property
+    def max_size(self):
+        return getattr(settings, "USER_CACHE_MAX_SIZE", 1024)
+
+    def get(self, user_id, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            entry = self.entries.get(str(user_id))
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(str(user_id))
+            self.hits += 1
+            expires_at, model, db, fields = entry
+        return restore(model, db, fields)
+
+    def set(self, user_id, user, generation, now=None):
+        if self.ttl <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[str(user_id)] = (now + self.ttl, type(user),
+                                          user._state.db, snapshot(user))
+            self.entries.move_to_end(str(user_id))
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.generation += 1
+            self.entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {"size": len(self.entries), "hits": self.hits,
+                    "misses": self.misses}
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits = self.misses = 0
+
+
+def snapshot(user):
+    return {name: value for name, value in user.__dict__.items()
+            if name != "_state"}
+
+
+def restore(model, db, fields):
+    user = model.__new__(model)
+    user.__dict__.update(fields)
+    user._state = ModelState()
+    user._state.adding = False
+    user._state.db = db
+    return user
+
+
+users = UserCache()
+
+
+def get_user(request):
+    """``django.contrib.auth.get_user`` with ``users`` in front of it.
+
+    A cached row is only returned while it still verifies the session's
+    auth hash; anything else (a password change, fallback secrets, an
+    unknown backend) goes through Django's own lookup.
+    """
+    try:
+        user_id = request.session[SESSION_KEY]
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        request._user_source = "anonymous"
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        request._user_source = "anonymous"
+        return AnonymousUser()
+
+    user = users.get(user_id)
+    if user is not None:
+        session_hash = request.session.get(HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(
+                session_hash, user.get_session_auth_hash()):
+            request._user_source = "cache"
+            return user
+        logger.info("Session hash mismatch for cached user %s", user_id)
+        users.invalidate(user_id)
+
+    generation = users.generation
+    user = auth.get_user(request)
+    request._user_source = "database"
+    if user.is_authenticated:
+        users.set(user_id, user, generation)
+    return user
@@ -1,11 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import HttpResponse, JsonResponse
 from django.urls import reverse_lazy
+from django.views import View
 from django.views.generic import ListView, DetailView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
+from . import fragments
+from .forms import PostForm
 from .models import Post
+from .pagination import KeysetPage
 
 class BlogListView(ListView):
     model = Post
     template_name = "home.html"
+    paginate_by = 10
+
+    def get_queryset(self):
+        # The template only shows the excerpt
+        return Post.objects.defer("body")
+
+    def paginate_queryset(self, queryset, page_size):
+        page = KeysetPage(queryset, self.request, page_size)
+        return (None, page, page.object_list,
+                page.has_next or page.has_previous)
 
 class BlogDetailView(DetailView):
     model = Post
@@ -15,7 +32,7 @@ class BlogCreateView(CreateView):
     model = Post
     template_name = "post_new.html"
     # template_name = "blog/post_form.html" #default
-    fields = ["title", "author", "body"]
+    form_class = PostForm
 
 class BlogUpdateView(UpdateView):
     model = Post
@@ -27,3 +44,52 @@ class BlogDeleteView(DeleteView):
     model = Post
     template_name = "post_delete.html"
     success_url = reverse_lazy('home')
+
+
+class FragmentCacheStatsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Fragment cache hits, misses and hit ratio in this process, per
+    fragment name. Staff only; DELETE resets the counters."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(fragments.stats.snapshot())
+
+    def delete(self, request, *args, **kwargs):
+        fragments.stats.reset()
+        return HttpResponse(status=204)
+
+
+def prefix_upper_bound(prefix):
+    """The smallest string greater than every string starting with
+    ``prefix``, so a prefix match can be an indexed range scan."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class AuthorLookupView(LoginRequiredMixin, View):
+    """Users whose username starts with ``?q=``, in username order.
+
+    Pages are keyset ranges on the unique username index: the response's
+    ``next`` is passed back as ``?after=``.
+    """
+    raise_exception = True
+    page_size = 20
+
+    def get(self, request, *args, **kwargs):
+        users = get_user_model().objects.order_by("username")
+        prefix = request.GET.get("q", "")
+        if prefix:
+            users = users.filter(username__gte=prefix,
+                                 username__lt=prefix_upper_bound(prefix))
+        after = request.GET.get("after")
+        if after:
+            users = users.filter(username__gt=after)
+        rows = list(users.values("id", "username")[:self.page_size + 1])
+        page = rows[:self.page_size]
+        return JsonResponse({
+            "results": page,
+            "next": page[-1]["username"] if len(rows) > self.page_size
+            else None,
+        })
+
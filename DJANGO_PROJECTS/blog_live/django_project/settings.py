@@ -46,10 +46,9 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.custom_user_middleware.CachedUserMiddleware', # new
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    # 'blog.custom_user_middleware.SpecialUserMiddleware',
     'blog.custom_user_middleware.ProtectSpecificRoutesMiddleware',
 ]
 
@@ -129,3 +128,33 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "home" 
+
+# Views anonymous users are redirected to the login page from, by URL
+# name (``namespace:name`` for namespaced URLs)
+PROTECTED_URL_NAMES = [ # new
+    "home",
+    "post_new",
+    "post_edit",
+    "post_delete",
+]
+
+CACHES = { # new
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Rendered post fragments and their version tokens (blog.fragments).
+    # Use a shared backend in production so every process sees a bump.
+    "fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "fragments",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+BLOG_FRAGMENT_CACHE = "fragments" # new
+BLOG_FRAGMENT_CACHE_TTL = 3600 # new
+
+# Seconds a session user is served from blog.user_cache
+USER_CACHE_TTL = 30 # new
+USER_CACHE_MAX_SIZE = 1024 # new
+# DEBUG logs one line per request (see blog.diagnostics)
+BLOG_DIAGNOSTICS_LEVEL = "INFO" # new
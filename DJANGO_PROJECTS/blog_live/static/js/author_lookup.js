@@ -0,0 +1,58 @@
+// Author picker for AuthorLookupWidget: nothing is fetched until the
+// user types, then one page of matching usernames at a time.
+document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll(".author-lookup").forEach(function (picker) {
+        var url = picker.dataset.lookupUrl;
+        var hidden = picker.querySelector("input[type=hidden]");
+        var search = picker.querySelector("input[type=search]");
+        var results = picker.querySelector(".author-lookup-results");
+        var timer = null;
+
+        function load(after) {
+            var params = new URLSearchParams({q: search.value});
+            if (after) {
+                params.set("after", after);
+            }
+            fetch(url + "?" + params, {credentials: "same-origin"})
+                .then(function (response) { return response.json(); })
+                .then(function (page) { show(page, Boolean(after)); });
+        }
+
+        function show(page, append) {
+            if (!append) {
+                results.innerHTML = "";
+            }
+            var more = results.querySelector(".author-lookup-more");
+            if (more) {
+                more.remove();
+            }
+            page.results.forEach(function (author) {
+                var item = document.createElement("li");
+                item.textContent = author.username;
+                item.addEventListener("click", function () {
+                    hidden.value = author.id;
+                    search.value = author.username;
+                    results.innerHTML = "";
+                });
+                results.appendChild(item);
+            });
+            if (page.next) {
+                var next = document.createElement("li");
+                next.className = "author-lookup-more";
+                next.textContent = "More…";
+                next.addEventListener("click", function () { load(page.next); });
+                results.appendChild(next);
+            }
+        }
+
+        search.addEventListener("input", function () {
+            hidden.value = "";
+            clearTimeout(timer);
+            if (!search.value) {
+                results.innerHTML = "";
+                return;
+            }
+            timer = setTimeout(function () { load(null); }, 250);
+        });
+    });
+});